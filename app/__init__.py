@@ -11,13 +11,113 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 data_dir = os.path.join(basedir, 'data')
 if not os.path.exists(data_dir):
     os.makedirs(data_dir)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(data_dir, 'data.sqlite')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL", 'sqlite:///' + os.path.join(data_dir, 'data.sqlite'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# SQLite connections get these pragmas when they are opened (see app/database.py).
+# WAL lets readers run alongside the single writer, and busy_timeout (milliseconds)
+# makes a writer wait for the lock instead of failing with "database is locked".
+app.config['SQLITE_JOURNAL_MODE'] = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv("SQLITE_BUSY_TIMEOUT", 15000))
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# Connection pool settings for server databases (PostgreSQL, MySQL).
+app.config['DB_POOL_SIZE'] = int(os.getenv("DB_POOL_SIZE", 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv("DB_MAX_OVERFLOW", 10))
+app.config['DB_POOL_RECYCLE'] = int(os.getenv("DB_POOL_RECYCLE", 1800))
+app.config['DB_POOL_PRE_PING'] = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'connect_args': {'timeout': app.config['SQLITE_BUSY_TIMEOUT'] / 1000}
+    }
+else:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': app.config['DB_POOL_PRE_PING']
+    }
+# Number of in-process job worker threads; set to 0 when jobs are run by `flask worker`.
+app.config['JOB_WORKERS'] = int(os.getenv("JOB_WORKERS", 1))
+app.config['JOB_POLL_INTERVAL'] = float(os.getenv("JOB_POLL_INTERVAL", 2))
+# A running job's worker records a heartbeat every JOB_HEARTBEAT_INTERVAL seconds;
+# workers re-queue running jobs whose heartbeat is older than JOB_TIMEOUT.
+app.config['JOB_HEARTBEAT_INTERVAL'] = float(os.getenv("JOB_HEARTBEAT_INTERVAL", 30))
+app.config['JOB_TIMEOUT'] = int(os.getenv("JOB_TIMEOUT", 120))
+# How often /job/<id>/stream checks the job for newly finished articles.
+app.config['JOB_STREAM_INTERVAL'] = float(os.getenv("JOB_STREAM_INTERVAL", 0.5))
+# Load the NLP models when job workers start instead of on the first job.
+app.config['MODEL_WARMUP'] = os.getenv("MODEL_WARMUP", "0").lower() in ("1", "true", "yes")
+# Inference backend for the summarizer and sentiment models: torch, quantized or onnx.
+app.config['INFERENCE_BACKEND'] = os.getenv("INFERENCE_BACKEND", "torch")
+# Send model calls to a shared `flask model-server` (http://host:port or unix:///path)
+# instead of loading the models in every process. Calls arriving within MAX_WAIT
+# seconds of each other are run as one batch of up to MAX_BATCH texts.
+app.config['MODEL_SERVER_URL'] = os.getenv("MODEL_SERVER_URL") or None
+app.config['MODEL_SERVER_TIMEOUT'] = float(os.getenv("MODEL_SERVER_TIMEOUT", 600))
+app.config['MODEL_SERVER_MAX_BATCH'] = int(os.getenv("MODEL_SERVER_MAX_BATCH", 16))
+app.config['MODEL_SERVER_MAX_WAIT'] = float(os.getenv("MODEL_SERVER_MAX_WAIT", 0.02))
+# Sentiment of the generated summary ('summary'), or of the full article text scored in
+# chunks of up to SENTIMENT_CHUNK_WORDS words, all chunks of a batch in one model call ('chunks').
+app.config['SENTIMENT_MODE'] = os.getenv("SENTIMENT_MODE", "summary")
+app.config['SENTIMENT_BATCH_SIZE'] = int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+app.config['SENTIMENT_CHUNK_WORDS'] = int(os.getenv("SENTIMENT_CHUNK_WORDS", 120))
+app.config['SENTIMENT_MAX_CHUNKS'] = int(os.getenv("SENTIMENT_MAX_CHUNKS", 32))
+# Articles longer than BART's 1024-token input are summarized window by window and the
+# partial summaries summarized again; the chunk budget keeps latency bounded.
+app.config['LONG_DOC_ENABLED'] = os.getenv("LONG_DOC_ENABLED", "1").lower() in ("1", "true", "yes")
+app.config['LONG_DOC_OVERLAP'] = int(os.getenv("LONG_DOC_OVERLAP", 128))
+app.config['LONG_DOC_MAX_CHUNKS'] = int(os.getenv("LONG_DOC_MAX_CHUNKS", 6))
+app.config['LONG_DOC_CHUNK_BEAMS'] = int(os.getenv("LONG_DOC_CHUNK_BEAMS", 2))
+app.config['LONG_DOC_CHUNK_MAX_LENGTH'] = int(os.getenv("LONG_DOC_CHUNK_MAX_LENGTH", 150))
+# Semantic search switches from brute force to an IVF index above IVF_MIN_ROWS articles.
+app.config['IVF_MIN_ROWS'] = int(os.getenv("IVF_MIN_ROWS", 20000))
+app.config['IVF_NPROBE'] = int(os.getenv("IVF_NPROBE", 8))
+# Index saves append to a per-user delta log, folded into the index file in the
+# background once it holds this many records (or by `flask reindex`).
+app.config['VECTOR_DELTA_MAX_ROWS'] = int(os.getenv("VECTOR_DELTA_MAX_ROWS", 5000))
+app.config['SEARCH_RESULTS'] = int(os.getenv("SEARCH_RESULTS", 20))
+# Folder and article listings are served in pages of PAGE_SIZE rows.
+app.config['PAGE_SIZE'] = int(os.getenv("PAGE_SIZE", 50))
+app.config['PAGE_SIZE_MAX'] = int(os.getenv("PAGE_SIZE_MAX", 200))
+# Number of most-used tags shown as filters on a folder page and by /api/tags.
+app.config['TAG_CLOUD_SIZE'] = int(os.getenv("TAG_CLOUD_SIZE", 30))
+app.config['FETCH_MAX_WORKERS'] = int(os.getenv("FETCH_MAX_WORKERS", 8))
+app.config['FETCH_PER_HOST'] = int(os.getenv("FETCH_PER_HOST", 2))
+app.config['FETCH_TIMEOUT'] = float(os.getenv("FETCH_TIMEOUT", 15))
+app.config['FETCH_RETRIES'] = int(os.getenv("FETCH_RETRIES", 2))
+app.config['RESULT_CACHE_ENABLED'] = os.getenv("RESULT_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+app.config['RESULT_CACHE_PATH'] = os.getenv("RESULT_CACHE_PATH", os.path.join(data_dir, 'cache.sqlite'))
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.getenv("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# How long a URL's result is reused before the page is fetched again.
+app.config['RESULT_CACHE_URL_TTL'] = int(os.getenv("RESULT_CACHE_URL_TTL", 24 * 3600))
+# NewsAPI search: results are cached for NEWSAPI_CACHE_TTL seconds and may be served
+# for NEWSAPI_STALE_TTL more while they are refreshed in the background. Upstream
+# requests are rate limited to the plan's daily quota, with bursts of NEWSAPI_BURST;
+# the limit is kept in the database, so it holds across all web processes.
+app.config['NEWSAPI_URL'] = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+app.config['NEWSAPI_KEY'] = os.getenv("API_KEY")
+app.config['NEWSAPI_TIMEOUT'] = float(os.getenv("NEWSAPI_TIMEOUT", 5))
+app.config['NEWSAPI_CACHE_TTL'] = int(os.getenv("NEWSAPI_CACHE_TTL", 900))
+app.config['NEWSAPI_STALE_TTL'] = int(os.getenv("NEWSAPI_STALE_TTL", 24 * 3600))
+app.config['NEWSAPI_REQUESTS_PER_DAY'] = int(os.getenv("NEWSAPI_REQUESTS_PER_DAY", 100))
+app.config['NEWSAPI_BURST'] = int(os.getenv("NEWSAPI_BURST", 10))
+# Bulk ingest (/api/ingest and `flask ingest`): URLs per request, pages fetched ahead
+# of the models, and how many finished articles are inserted per commit.
+app.config['INGEST_MAX_URLS'] = int(os.getenv("INGEST_MAX_URLS", 1000))
+app.config['INGEST_MAX_IN_FLIGHT'] = int(os.getenv("INGEST_MAX_IN_FLIGHT", 16))
+app.config['INGEST_COMMIT_SIZE'] = int(os.getenv("INGEST_COMMIT_SIZE", 25))
+# Lifetime of server-side pipeline results (finished jobs and pending replacements).
+app.config['RESULT_STORE_TTL'] = int(os.getenv("RESULT_STORE_TTL", 24 * 3600))
+# Maximum SimHash bit distance for two articles to count as near-duplicates; the
+# band lookup in app.fingerprint only finds matches for distances up to 3.
+app.config['NEAR_DUP_MAX_DISTANCE'] = int(os.getenv("NEAR_DUP_MAX_DISTANCE", 3))
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>" when a token is set, and
+# otherwise only answers requests from this host.
+app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
 db = SQLAlchemy(app)
 login = LoginManager(app)
 login.login_view = 'login'
 migrate = Migrate(app, db)
 
-from app import view
+from app import database, view, commands
 from app.models import *
 
@@ -0,0 +1,114 @@
+from urllib.parse import urlparse
+from sqlalchemy import case, func
+from app import db
+from app.models import Article, Folder
+
+LABELS = ('Positive', 'Neutral', 'Negative')
+# Score histogram bin edges. senti_score is the winning label's probability, so it
+# is never below 1/3.
+EDGES = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+PERIODS = {'day': 10, 'month': 7, 'year': 4}
+
+
+def domain_of(url):
+    host = urlparse(url or '').netloc.lower().split('@')[-1].split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def scope(user_id, folder_id=None, article_ids=None):
+    conditions = [Article.user_id == user_id]
+    if folder_id is not None:
+        conditions.append(Article.folder_id == folder_id)
+    if article_ids is not None:
+        conditions.append(Article.id.in_(article_ids))
+    return conditions
+
+
+def label_order():
+    # Positive, Neutral, Negative, then anything unexpected.
+    return case(*[(Article.senti_label == label, i) for i, label in enumerate(LABELS)], else_=len(LABELS))
+
+
+def ranked_articles(conditions):
+    # Articles grouped by label and ordered by score in one indexed query.
+    return Article.query.filter(*conditions).order_by(label_order(), Article.senti_score.desc(), Article.id).all()
+
+
+def summary(conditions):
+    rows = db.session.query(Article.senti_label, func.count(), func.avg(Article.senti_score),
+                            func.min(Article.senti_score), func.max(Article.senti_score)) \
+        .filter(*conditions).group_by(Article.senti_label).order_by(label_order()).all()
+    total = sum(row[1] for row in rows)
+    return {'total': total, 'labels': [
+        {'label': label, 'count': count, 'share': round(count / total, 4), 'mean': round(mean or 0, 4),
+         'min': low, 'max': high} for label, count, mean, low, high in rows]}
+
+
+def distribution(conditions):
+    # Portable histogram: a CASE bucket per row, counted with GROUP BY.
+    bucket = case(*[(Article.senti_score < edge, i) for i, edge in enumerate(EDGES[1:])], else_=len(EDGES) - 2)
+    counts = {}
+    for label, index, count in db.session.query(Article.senti_label, bucket, func.count()) \
+            .filter(*conditions, Article.senti_score.isnot(None)).group_by(Article.senti_label, bucket):
+        counts.setdefault(label, [0] * (len(EDGES) - 1))[index] = count
+    return {'edges': list(EDGES), 'counts': counts}
+
+
+def new_group(key):
+    return {'key': key, 'count': 0, 'mean': 0.0, 'labels': {}}
+
+
+def add_counts(group, label, count, mean):
+    group['labels'][label] = group['labels'].get(label, 0) + count
+    group['mean'] += (mean or 0) * count
+    group['count'] += count
+
+
+def finish_group(group):
+    group['mean'] = round(group['mean'] / group['count'], 4)
+    return group
+
+
+def period_of(period):
+    # Article.date holds ISO timestamps as text, so a prefix is the calendar period.
+    return func.substr(Article.date, 1, PERIODS[period])
+
+
+def grouped(conditions, key, limit=None, order_by_key=False, period=None):
+    # One GROUP BY key, label query; each group gets its per-label counts and an
+    # overall mean weighted by count. With a period the query groups by key, period,
+    # label and each group also gets a timeline of the same figures, oldest first.
+    columns = [key, period_of(period)] if period else [key]
+    groups = {}
+    for row in db.session.query(*columns, Article.senti_label, func.count(), func.avg(Article.senti_score)) \
+            .filter(*conditions, key.isnot(None)).group_by(*columns, Article.senti_label):
+        value, label, count, mean = row[0], row[-3], row[-2], row[-1]
+        group = groups.setdefault(value, new_group(value))
+        add_counts(group, label, count, mean)
+        if period and row[1] is not None:
+            add_counts(group.setdefault('timeline', {}).setdefault(row[1], new_group(row[1])), label, count, mean)
+    for group in groups.values():
+        finish_group(group)
+        if period:
+            group['timeline'] = [finish_group(entry) for _, entry in sorted(group.get('timeline', {}).items())]
+    if order_by_key:
+        rows = sorted(groups.values(), key=lambda group: group['key'])
+    else:
+        rows = sorted(groups.values(), key=lambda group: (-group['count'], str(group['key'])))
+    return rows[:limit] if limit else rows
+
+
+def by_folder(conditions, limit=None, period=None):
+    rows = grouped(conditions, Article.folder_id, limit, period=period)
+    names = dict(db.session.query(Folder.id, Folder.name).filter(Folder.id.in_([row['key'] for row in rows])))
+    for row in rows:
+        row['name'] = names.get(row['key'])
+    return rows
+
+
+def by_domain(conditions, limit=None, period=None):
+    return grouped(conditions, Article.domain, limit, period=period)
+
+
+def timeline(conditions, period='month'):
+    return grouped(conditions, period_of(period), order_by_key=True)
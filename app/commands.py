@@ -0,0 +1,120 @@
+import click
+from app import app, db
+from app.jobs import recover_jobs, purge_jobs, work
+from app.model_registry import LOADERS, warm_up
+from app import model_server, result_cache, vector_index
+from app.ingest import ingest, parse_urls
+from app.reprocess import reprocess
+from app.models import User, Folder
+
+
+@app.cli.command('worker')
+def worker():
+    """Run queued summarization jobs until interrupted."""
+    recover_jobs()
+    purge_jobs()
+    if app.config['MODEL_WARMUP'] and not model_server.enabled():
+        warm_up()
+    click.echo('Job worker started.')
+    work()
+
+
+@app.cli.command('warmup')
+@click.argument('names', nargs=-1, type=click.Choice(sorted(LOADERS)))
+def warmup(names):
+    """Load the NLP models and report how long each one took."""
+    for name, seconds in warm_up(names).items():
+        click.echo(f'{name}: {seconds:.1f}s')
+
+
+@app.cli.command('model-server')
+@click.option('--bind', default=None, help='http://host:port or unix:///path; defaults to MODEL_SERVER_URL.')
+def model_server_command(bind):
+    """Load the NLP models and serve them to the web and job workers."""
+    bind = bind or app.config['MODEL_SERVER_URL'] or 'http://127.0.0.1:8765'
+    for name, seconds in warm_up().items():
+        click.echo(f'{name}: {seconds:.1f}s')
+    click.echo(f'Model server listening on {bind}.')
+    model_server.serve(bind)
+
+
+@app.cli.group('cache')
+def cache():
+    """Inspect or clear the model result cache."""
+
+
+@cache.command('stats')
+def cache_stats():
+    conn = result_cache.get_connection()
+    for namespace, count, size in conn.execute(
+            'SELECT namespace, COUNT(*), SUM(size) FROM cache GROUP BY namespace ORDER BY namespace'):
+        click.echo(f'{namespace}: {count} entries, {size} bytes')
+
+
+@cache.command('clear')
+def cache_clear():
+    result_cache.clear()
+    click.echo('Result cache cleared.')
+
+
+@app.cli.command('reindex')
+def reindex():
+    """Rebuild every user's semantic search index from the stored embeddings, folding in the delta logs."""
+    for user in User.query.all():
+        index = vector_index.rebuild_index(user.id)
+        click.echo(f'{user.username}: {len(index)} articles indexed')
+
+
+@app.cli.command('reprocess')
+@click.option('--user', 'username', default=None, help='Only this user\'s articles.')
+@click.option('--max-count', default=100, type=click.IntRange(50, 300), show_default=True)
+@click.option('--min-count', default=100, type=click.IntRange(50, 300), show_default=True)
+@click.option('--batch-size', default=16, type=click.IntRange(1), show_default=True)
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an interrupted run.')
+def reprocess_command(username, max_count, min_count, batch_size, restart):
+    """Run the models again over the stored text of saved articles."""
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'Unknown user {username!r}')
+        user_id = user.id
+
+    def report(processed, total):
+        click.echo(f'{processed}/{total} articles reprocessed')
+
+    processed, total = reprocess(max_count, min_count, batch_size, user_id=user_id, restart=restart,
+                                 on_batch=report)
+    click.echo(f'Done: {processed} of {total} articles with stored text reprocessed.')
+
+
+@app.cli.command('ingest')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--user', 'username', required=True, help='Owner of the folder.')
+@click.option('--folder', 'folder_name', required=True, help='Folder to save into; created if missing.')
+@click.option('--max-count', default=100, type=click.IntRange(50, 300), show_default=True)
+@click.option('--min-count', default=100, type=click.IntRange(50, 300), show_default=True)
+def ingest_command(source, username, folder_name, max_count, min_count):
+    """Summarize every URL in SOURCE (a file, or - for stdin) into a folder."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f'Unknown user {username!r}')
+    folder = Folder.query.filter_by(user_id=user.id, name=folder_name).first()
+    if folder is None:
+        folder = Folder(name=folder_name, user_id=user.id)
+        db.session.add(folder)
+        db.session.commit()
+        click.echo(f'Created folder {folder_name!r}.')
+    urls = parse_urls(source.read())
+    click.echo(f'Ingesting {len(urls)} URLs into {folder_name!r}.')
+
+    def report(progress):
+        click.echo(f"{progress['processed'] + progress['skipped']}/{progress['total']} done, "
+                   f"{progress['saved']} saved, {progress['articles_per_second']:.2f} articles/s")
+
+    progress, errors = ingest(user.id, folder.id, urls, max_count, min_count, on_progress=report)
+    for error in errors:
+        click.echo(f'failed: {error}', err=True)
+    click.echo(f"Saved {progress['saved']} articles, skipped {progress['skipped']} already saved, "
+               f"{progress['failed']} failed in {progress['seconds']:.1f}s "
+               f"({progress['articles_per_second']:.2f} articles/s).")
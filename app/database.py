@@ -0,0 +1,42 @@
+import sqlite3
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app, metrics
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+# Keeps IN (...) lists below SQLite's bound-parameter limit.
+IN_CHUNK = 500
+
+
+def chunks(values):
+    values = list(values)
+    for start in range(0, len(values), IN_CHUNK):
+        yield values[start:start + IN_CHUNK]
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    config = app.config
+    if config['SQLITE_SYNCHRONOUS'].upper() not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLITE_SYNCHRONOUS {config['SQLITE_SYNCHRONOUS']!r}, "
+                         f"expected one of {SYNCHRONOUS_MODES}")
+    cursor = dbapi_connection.cursor()
+    # journal_mode is persistent in the database file; the others are per connection.
+    cursor.execute(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}")
+    cursor.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS'].upper()}")
+    cursor.close()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_start'].pop()
+    metrics.record(metrics.db_query_seconds, 'db', seconds, statement=(statement.split(None, 1) or ['?'])[0].upper())
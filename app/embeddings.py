@@ -0,0 +1,35 @@
+import base64
+import numpy as np
+
+# Embeddings are kept as raw float32 bytes: 1.5 KB per MiniLM vector in the
+# database, base64-encoded while they travel inside JSON job results.
+DTYPE = np.float32
+
+
+def to_bytes(vector):
+    return np.asarray(vector, dtype=DTYPE).tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+def encode(vector):
+    return base64.b64encode(to_bytes(vector)).decode('ascii')
+
+
+def decode(text):
+    return base64.b64decode(text) if text else None
+
+
+def embed(texts):
+    # Unit-length MiniLM sentence embeddings, so a dot product is the cosine similarity.
+    from app import metrics, model_server
+    from app.model_registry import get_model
+    with metrics.timed('embed'):
+        if model_server.enabled():
+            vectors = np.stack([from_bytes(decode(vector)) for vector in model_server.call('embed', texts)])
+        else:
+            vectors = np.asarray(get_model('keywords').model.embed(texts), dtype=DTYPE)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
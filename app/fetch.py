@@ -0,0 +1,96 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from itertools import islice
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app import app, metrics
+
+USER_AGENT = 'Mozilla/5.0 (compatible; summarization_web)'
+
+_session = None
+_session_lock = threading.Lock()
+# host -> [semaphore, threads holding or waiting for it]; an entry is dropped once
+# that count is back to zero, so the dict only holds hosts being fetched right now.
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=app.config['FETCH_RETRIES'], backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+            adapter = HTTPAdapter(pool_connections=app.config['FETCH_MAX_WORKERS'],
+                                  pool_maxsize=app.config['FETCH_MAX_WORKERS'], max_retries=retry)
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+@contextmanager
+def host_slot(url):
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        entry = _host_semaphores.get(host)
+        if entry is None:
+            entry = _host_semaphores[host] = [threading.BoundedSemaphore(app.config['FETCH_PER_HOST']), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _host_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _host_semaphores[host]
+
+
+def fetch_html(url):
+    with host_slot(url):
+        response = get_session().get(url, timeout=app.config['FETCH_TIMEOUT'])
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_article(url):
+    from newsplease import NewsPlease
+    with metrics.timed('fetch'):
+        html = fetch_html(url)
+    with metrics.timed('parse'):
+        return NewsPlease.from_html(html, url=url, fetch_images=False)
+
+
+def _fetch_one(url):
+    try:
+        return url, fetch_article(url), None
+    except Exception as e:
+        return url, None, e
+
+
+def iter_fetched(urls, max_in_flight=None):
+    # Yields lists of (url, article, error) tuples as downloads finish; each list holds
+    # everything that completed while the caller was busy with the previous one.
+    # With max_in_flight, at most that many pages are downloading or waiting for the
+    # caller at once, so a slow consumer holds back the fetchers (backpressure).
+    if not urls:
+        return
+    workers = min(len(urls), app.config['FETCH_MAX_WORKERS'])
+    queued = iter(urls)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch') as executor:
+        # Each download runs in a copy of the caller's context so its timings land in
+        # the caller's request or job trace.
+        remaining = {executor.submit(contextvars.copy_context().run, _fetch_one, url)
+                     for url in islice(queued, max_in_flight)}
+        while remaining:
+            done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            yield [future.result() for future in done]
+            remaining |= {executor.submit(contextvars.copy_context().run, _fetch_one, url)
+                          for url in islice(queued, len(done))}
@@ -0,0 +1,73 @@
+import hashlib
+import re
+import numpy as np
+from sqlalchemy import and_, or_
+from app import app, db
+from app.models import Article, ArticleFingerprint
+
+SHINGLE_SIZE = 3
+BANDS = 4
+BAND_BITS = 64 // BANDS
+MASK = (1 << 64) - 1
+
+
+def shingles(text):
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text):
+    # 64-bit SimHash over word 3-shingles, returned as a signed integer so it fits
+    # an SQL BIGINT. Near-duplicate texts differ in only a few bits.
+    hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+                       for shingle in shingles(text)] or [0], dtype='>u8')
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(-1, 64)
+    weights = bits.sum(axis=0) * 2 - len(hashes)
+    value = int(''.join('1' if weight > 0 else '0' for weight in weights), 2)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming(a, b):
+    return bin((a ^ b) & MASK).count('1')
+
+
+def bands(value):
+    # With at most BANDS - 1 differing bits, at least one 16-bit band is identical,
+    # so candidates can be found with exact indexed lookups on the bands.
+    value &= MASK
+    return [(value >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1) for band in range(BANDS)]
+
+
+def is_near_duplicate(a, b):
+    return hamming(a, b) <= app.config['NEAR_DUP_MAX_DISTANCE']
+
+
+def fingerprint_rows(article_id, user_id, value):
+    if value is None:
+        return []
+    return [{'article_id': article_id, 'user_id': user_id, 'band': band, 'value': band_value}
+            for band, band_value in enumerate(bands(value))]
+
+
+def set_fingerprint(article, value):
+    article.simhash = value
+    article.fingerprints = [] if value is None else [
+        ArticleFingerprint(user_id=article.user_id, band=band, value=band_value)
+        for band, band_value in enumerate(bands(value))]
+
+
+def find_saved_duplicate(user_id, value, exclude_url=None):
+    # Candidates are compared on (id, simhash) alone; only the closest match is loaded.
+    conditions = [and_(ArticleFingerprint.band == band, ArticleFingerprint.value == band_value)
+                  for band, band_value in enumerate(bands(value))]
+    candidates = db.session.query(Article.id, Article.url, Article.simhash).join(ArticleFingerprint) \
+        .filter(ArticleFingerprint.user_id == user_id, or_(*conditions))
+    if exclude_url is not None:
+        candidates = candidates.filter(Article.url != exclude_url)
+    matches = [(hamming(simhash, value), article_id) for article_id, _, simhash in candidates.distinct()
+               if is_near_duplicate(simhash, value)]
+    if not matches:
+        return None
+    return db.session.get(Article, min(matches)[1])
@@ -0,0 +1,130 @@
+import re
+import time
+from sqlalchemy import insert
+from app import app, db, analytics, embeddings, fingerprint, stored_text, tag_index, vector_index
+from app.database import chunks
+from app.models import Article, ArticleFingerprint
+from app.pipeline import run_pipeline
+
+URL_PATTERN = re.compile(r'https?://[^\s"\'<>,]+')
+
+
+def parse_urls(text):
+    # Accepts one URL per line, or any text with URLs in it (CSV exports, feeds).
+    urls = []
+    seen = set()
+    for url in URL_PATTERN.findall(text or ''):
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+def saved_urls(user_id, folder_id, urls):
+    found = set()
+    for part in chunks(urls):
+        found.update(url for url, in db.session.query(Article.url).filter(
+            Article.user_id == user_id, Article.folder_id == folder_id, Article.url.in_(part)))
+    return found
+
+
+def duplicate_urls(results):
+    # URLs that appear more than once, in order of their second appearance.
+    seen = set()
+    duplicates = []
+    for result in results:
+        if result['url'] in seen and result['url'] not in duplicates:
+            duplicates.append(result['url'])
+        seen.add(result['url'])
+    return duplicates
+
+
+def save_articles(user_id, folder_id, results, texts=None):
+    # Inserts pipeline results as new articles of a folder and returns their
+    # (id, url) pairs; the caller commits. texts maps content_hash to the encoded
+    # extracted text collected by run_pipeline. Articles are keyed by URL within a
+    # folder, so a URL given twice is an error rather than one copy silently lost.
+    if not results:
+        return []
+    duplicates = duplicate_urls(results)
+    if duplicates:
+        raise ValueError(f'URLs selected more than once: {", ".join(duplicates)}')
+    texts = texts or {}
+    rows = {result['url']: {
+        'url': result['url'],
+        'title': result['title'],
+        'author': result['author'],
+        'date': result['date'],
+        'summary': result['summary'],
+        'senti_score': result['senti_score'],
+        'senti_label': result['senti_label'],
+        'tags': result['tags'],
+        'embedding': embeddings.decode(result.get('embedding')),
+        'summary_embedding': embeddings.decode(result.get('summary_embedding')),
+        'simhash': result.get('simhash'),
+        'domain': analytics.domain_of(result['url']),
+        'content': stored_text.decode(texts.get(result.get('content_hash'))),
+        'content_hash': result.get('content_hash'),
+        'user_id': user_id,
+        'folder_id': folder_id
+    } for result in results}
+    # A single executemany INSERT for all new rows. SQLite cannot return the ids
+    # of a batch insert, so they are read back with one indexed lookup.
+    db.session.execute(insert(Article), list(rows.values()))
+    new_ids = db.session.query(Article.id, Article.url).filter(
+        Article.user_id == user_id, Article.folder_id == folder_id, Article.url.in_(rows)).all()
+    fingerprints = [row for article_id, url in new_ids
+                    for row in fingerprint.fingerprint_rows(article_id, user_id, rows[url]['simhash'])]
+    if fingerprints:
+        db.session.execute(insert(ArticleFingerprint), fingerprints)
+    tag_index.index_tags([(article_id, user_id, rows[url]['tags']) for article_id, url in new_ids])
+    return new_ids
+
+
+def index_saved(user_id, new_ids):
+    # The commit expired the new rows; reload them together rather than one refresh each.
+    if new_ids:
+        vector_index.index_articles(user_id, Article.query.filter(
+            Article.id.in_([article_id for article_id, _ in new_ids])).all())
+
+
+def ingest(user_id, folder_id, urls, max_count, min_count, on_progress=None):
+    # Summarizes a large list of URLs straight into a folder. URLs already saved in
+    # the folder are skipped, downloads run at most INGEST_MAX_IN_FLIGHT pages ahead
+    # of the models, and finished articles are bulk-inserted every INGEST_COMMIT_SIZE.
+    start = time.perf_counter()
+    urls = parse_urls('\n'.join(urls))
+    existing = saved_urls(user_id, folder_id, urls)
+    todo = [url for url in urls if url not in existing]
+    progress = {'total': len(urls), 'skipped': len(urls) - len(todo), 'processed': 0, 'saved': 0,
+                'failed': 0, 'seconds': 0.0, 'articles_per_second': 0.0}
+    pending = []
+    texts = {}
+
+    def report():
+        progress['seconds'] = round(time.perf_counter() - start, 2)
+        progress['articles_per_second'] = round(progress['processed'] / max(progress['seconds'], 1e-9), 2)
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    def flush():
+        new_ids = save_articles(user_id, folder_id, pending, texts)
+        db.session.commit()
+        index_saved(user_id, new_ids)
+        progress['saved'] += len(new_ids)
+        for result in pending:
+            texts.pop(result.get('content_hash'), None)
+        pending.clear()
+        report()
+
+    def on_result(results):
+        pending.append(results[-1])
+        progress['processed'] += 1
+        if len(pending) >= app.config['INGEST_COMMIT_SIZE']:
+            flush()
+
+    _, errors = run_pipeline(todo, max_count, min_count, on_result=on_result, user_id=user_id,
+                             max_in_flight=app.config['INGEST_MAX_IN_FLIGHT'], texts=texts)
+    progress['failed'] = len(errors)
+    flush()
+    return progress, errors
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import app, db, metrics, model_server
+from app.models import Job
+from app.model_registry import warm_up_in_background
+from app.pipeline import run_pipeline
+from app.ingest import ingest
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+_next_run = {}
+_next_run_lock = threading.Lock()
+
+
+def submit_job(user_id, urls, max_count, min_count, folder_id=None):
+    # Jobs with a folder_id are bulk ingests: their articles are saved straight into
+    # the folder and job.results holds the ingest progress instead of the articles.
+    payload = {'urls': urls, 'max_count': max_count, 'min_count': min_count}
+    if folder_id is not None:
+        payload['folder_id'] = folder_id
+    job = Job(user_id=user_id, status=PENDING, payload=payload)
+    db.session.add(job)
+    db.session.commit()
+    _wakeup.set()
+    return job
+
+
+def recover_jobs():
+    # A running job whose heartbeat is older than JOB_TIMEOUT belonged to a worker
+    # that died (e.g. a restart mid-pipeline), so it goes back on the queue.
+    cutoff = datetime.now() - timedelta(seconds=app.config['JOB_TIMEOUT'])
+    recovered = Job.query.filter(Job.status == RUNNING, func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff) \
+        .update({'status': PENDING, 'started_at': None, 'heartbeat_at': None}, synchronize_session=False)
+    db.session.commit()
+    if recovered:
+        logger.info('Re-queued %d stale jobs', recovered)
+
+
+def due(name, interval):
+    # True for one worker thread of the process every interval seconds.
+    with _next_run_lock:
+        now = time.monotonic()
+        if now < _next_run.get(name, 0):
+            return False
+        _next_run[name] = now + interval
+        return True
+
+
+def send_heartbeats(job_id, stop_event):
+    # Runs beside a job while the worker is busy with it, so a job that takes longer
+    # than JOB_TIMEOUT is not mistaken for an abandoned one.
+    while not stop_event.wait(app.config['JOB_HEARTBEAT_INTERVAL']):
+        with app.app_context():
+            try:
+                Job.query.filter_by(id=job_id, status=RUNNING) \
+                    .update({'heartbeat_at': datetime.now()}, synchronize_session=False)
+                db.session.commit()
+            except Exception:
+                logger.exception('Heartbeat for job %s failed', job_id)
+                db.session.rollback()
+
+
+def purge_jobs():
+    cutoff = datetime.now() - timedelta(seconds=app.config['RESULT_STORE_TTL'])
+    purged = Job.query.filter(Job.status.in_((DONE, FAILED)), Job.finished_at < cutoff) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return purged
+
+
+def claim_next_job():
+    job = Job.query.filter_by(status=PENDING).order_by(Job.id).first()
+    if job is None:
+        return None
+    # Only the worker whose UPDATE flips the row from pending wins it, so several
+    # worker processes can share the queue safely.
+    now = datetime.now()
+    claimed = Job.query.filter_by(id=job.id, status=PENDING) \
+        .update({'status': RUNNING, 'started_at': now, 'heartbeat_at': now}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return None
+    return db.session.get(Job, job.id)
+
+
+def run_job(job):
+    payload = job.payload
+    kind = 'ingest' if payload.get('folder_id') is not None else 'summarize'
+    trace, token = metrics.start_trace()
+    start = time.perf_counter()
+    if job.created_at and job.started_at:
+        metrics.job_wait_seconds.observe((job.started_at - job.created_at).total_seconds())
+
+    def save_progress(results):
+        job.results = list(results)
+        db.session.commit()
+
+    def save_ingest_progress(progress):
+        job.results = progress
+        db.session.commit()
+
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=send_heartbeats, args=(job.id, stop_heartbeat), name=f'job-{job.id}-heartbeat',
+                     daemon=True).start()
+    try:
+        if payload.get('folder_id') is not None:
+            results, errors = ingest(job.user_id, payload['folder_id'], payload['urls'], payload['max_count'],
+                                     payload['min_count'], on_progress=save_ingest_progress)
+        else:
+            # The texts are kept apart from the streamed results and only read back
+            # when the results are saved.
+            texts = {}
+            results, errors = run_pipeline(payload['urls'], payload['max_count'], payload['min_count'],
+                                           on_result=save_progress, user_id=job.user_id, texts=texts)
+            job.texts = texts
+        job.results = results
+        job.errors = errors
+        job.status = DONE
+    except Exception as e:
+        logger.exception('Job %s failed', job.id)
+        job.errors = [str(e)]
+        job.status = FAILED
+    finally:
+        stop_heartbeat.set()
+    job.finished_at = datetime.now()
+    db.session.commit()
+    seconds = time.perf_counter() - start
+    metrics.end_trace(token)
+    metrics.job_seconds.observe(seconds, kind=kind)
+    metrics.log_event('job', job_id=job.id, kind=kind, status=job.status, urls=len(payload['urls']),
+                      errors=len(job.errors or []), ms=round(seconds * 1000, 1), stages=trace.summary())
+
+
+def work(stop_event=None):
+    poll_interval = app.config['JOB_POLL_INTERVAL']
+    while stop_event is None or not stop_event.is_set():
+        with app.app_context():
+            try:
+                # Jobs of workers that died are picked up, and expired results removed,
+                # while this one keeps running.
+                if due('recover', app.config['JOB_HEARTBEAT_INTERVAL']):
+                    recover_jobs()
+                if due('purge', app.config['RESULT_STORE_TTL'] / 10):
+                    purge_jobs()
+                job = claim_next_job()
+                if job is not None:
+                    run_job(job)
+                    continue
+            except Exception:
+                logger.exception('Job worker error')
+                db.session.rollback()
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+
+
+def start_workers(count):
+    with _workers_lock:
+        if _workers:
+            return _workers
+        with app.app_context():
+            recover_jobs()
+            purge_jobs()
+        if app.config['MODEL_WARMUP'] and not model_server.enabled():
+            warm_up_in_background()
+        for i in range(count):
+            worker = threading.Thread(target=work, name=f'job-worker-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+    return _workers
+
+
+def ensure_workers():
+    count = app.config['JOB_WORKERS']
+    if count and not _workers:
+        start_workers(count)
@@ -0,0 +1,134 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from single DB queries up to long BART generations.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    # Cumulative-bucket histogram rendered in the Prometheus text format, one series per label set.
+    def __init__(self, name, help_text, label_names=(), buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                labels = list(zip(self.label_names, key))
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f"{self.name}_bucket{format_labels(labels + [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{format_labels(labels + [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{format_labels(labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {series['count']}")
+        return lines
+
+
+def render_gauge(name, help_text, values, metric_type='gauge'):
+    # values maps a tuple of (label, value) pairs to the sample value.
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{format_labels(list(labels))} {value}')
+    return lines
+
+
+stage_seconds = Histogram('summarization_stage_seconds',
+                          'Time spent in each summarization pipeline stage.', ('stage',))
+job_seconds = Histogram('summarization_job_seconds', 'Time from a job being claimed to it finishing.', ('kind',))
+job_wait_seconds = Histogram('summarization_job_wait_seconds', 'Time jobs spent queued before a worker claimed them.')
+db_query_seconds = Histogram('db_query_seconds', 'Database statement execution time.', ('statement',))
+http_request_seconds = Histogram('http_request_seconds', 'HTTP request handling time.',
+                                 ('endpoint', 'method', 'status'))
+
+
+class Trace:
+    # Per-request (or per-job) totals per stage, shared with the fetch threads it starts.
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.stages[stage] += seconds
+            self.counts[stage] += 1
+
+    def summary(self):
+        with self.lock:
+            return {stage: {'ms': round(seconds * 1000, 1), 'calls': self.counts[stage]}
+                    for stage, seconds in self.stages.items()}
+
+
+_trace = contextvars.ContextVar('trace', default=None)
+
+
+def start_trace():
+    trace = Trace()
+    return trace, _trace.set(trace)
+
+
+def end_trace(token):
+    _trace.reset(token)
+
+
+def record(histogram, stage_name, seconds, **labels):
+    histogram.observe(seconds, **labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage_name, seconds)
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage_seconds, stage, time.perf_counter() - start, stage=stage)
+
+
+def log_event(event, **fields):
+    # One JSON object per line, so request and job timings can be grepped and parsed.
+    logger.info(json.dumps(dict({'event': event}, **fields), default=str))
+
+
+def render(extra=()):
+    lines = []
+    for histogram in (stage_seconds, job_seconds, job_wait_seconds, db_query_seconds, http_request_seconds):
+        lines.extend(histogram.render())
+    for block in extra:
+        lines.extend(block)
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from app import app, data_dir
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL_ID = 'facebook/bart-large-cnn'
+SENTIMENT_MODEL_ID = 'cardiffnlp/twitter-roberta-base-sentiment'
+KEYWORD_MODEL_ID = 'all-MiniLM-L6-v2'
+
+# 'torch' is the fp32 PyTorch model, 'quantized' applies dynamic int8 quantization
+# to its Linear layers and 'onnx' runs an exported graph on ONNX Runtime.
+BACKENDS = ('torch', 'quantized', 'onnx')
+ONNX_DIR = os.path.join(data_dir, 'onnx')
+
+
+def quantize(model):
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_onnx(model_class_name, model_id):
+    try:
+        from optimum import onnxruntime
+    except ImportError:
+        raise RuntimeError("The 'onnx' inference backend requires optimum[onnxruntime] to be installed")
+    model_class = getattr(onnxruntime, model_class_name)
+    # Exporting takes minutes, so the exported graph is kept under data/onnx and reused.
+    export_dir = os.path.join(ONNX_DIR, model_id.replace('/', '--'))
+    if os.path.isdir(export_dir):
+        return model_class.from_pretrained(export_dir)
+    model = model_class.from_pretrained(model_id, export=True)
+    model.save_pretrained(export_dir)
+    return model
+
+
+# Heavy libraries are imported inside the loaders so that importing the app
+# (CLI commands, login and folder pages) does not pull in torch/transformers.
+def load_summarizer(backend='torch'):
+    from transformers import BartTokenizer, BartForConditionalGeneration
+    tokenizer = BartTokenizer.from_pretrained(SUMMARY_MODEL_ID)
+    if backend == 'onnx':
+        summary_model = load_onnx('ORTModelForSeq2SeqLM', SUMMARY_MODEL_ID)
+    else:
+        summary_model = BartForConditionalGeneration.from_pretrained(SUMMARY_MODEL_ID).eval()
+        if backend == 'quantized':
+            summary_model = quantize(summary_model)
+    return tokenizer, summary_model
+
+
+def load_sentiment(backend='torch'):
+    from transformers import pipeline
+    if backend == 'torch':
+        return pipeline("sentiment-analysis", model=SENTIMENT_MODEL_ID)
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_ID)
+    if backend == 'onnx':
+        model = load_onnx('ORTModelForSequenceClassification', SENTIMENT_MODEL_ID)
+    else:
+        model = quantize(AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_ID).eval())
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+
+def load_keyword_model(backend='torch'):
+    from keybert import KeyBERT
+    return KeyBERT(model=KEYWORD_MODEL_ID)
+
+
+LOADERS = {
+    'summarizer': load_summarizer,
+    'sentiment': load_sentiment,
+    'keywords': load_keyword_model,
+}
+
+MODEL_IDS = {
+    'summarizer': SUMMARY_MODEL_ID,
+    'sentiment': SENTIMENT_MODEL_ID,
+    'keywords': KEYWORD_MODEL_ID,
+}
+
+_models = {}
+_locks = {name: threading.Lock() for name in LOADERS}
+load_times = {}
+
+
+def backend_for(name):
+    # KeyBERT's sentence-transformers model always runs on PyTorch.
+    if name == 'keywords':
+        return 'torch'
+    backend = app.config['INFERENCE_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown inference backend {backend!r}, expected one of {BACKENDS}')
+    return backend
+
+
+def get_model(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _locks[name]:
+        if name not in _models:
+            start = time.perf_counter()
+            backend = backend_for(name)
+            _models[name] = LOADERS[name](backend)
+            load_times[name] = time.perf_counter() - start
+            logger.info('Loaded model %s (%s) in %.1fs', name, backend, load_times[name])
+        return _models[name]
+
+
+def model_id(name):
+    return f'{MODEL_IDS[name]}@{backend_for(name)}'
+
+
+def unload(name):
+    with _locks[name]:
+        _models.pop(name, None)
+        load_times.pop(name, None)
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def warm_up(names=None):
+    for name in names or LOADERS:
+        get_model(name)
+    return {name: load_times.get(name, 0.0) for name in names or LOADERS}
+
+
+def warm_up_in_background(names=None):
+    thread = threading.Thread(target=warm_up, args=(names,), name='model-warmup', daemon=True)
+    thread.start()
+    return thread
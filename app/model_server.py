@@ -0,0 +1,251 @@
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlparse
+from app import app
+
+logger = logging.getLogger(__name__)
+
+# One process owns the models and every web or job worker sends it its model calls
+# (MODEL_SERVER_URL, http://host:port or unix:///path/to.sock). Calls for the same
+# operation that arrive within MODEL_SERVER_MAX_WAIT of each other run as one batch.
+
+
+class ModelServerError(Exception):
+    pass
+
+
+def enabled():
+    return bool(app.config['MODEL_SERVER_URL'])
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+_local = threading.local()
+
+
+def connection():
+    # One keep-alive connection per thread.
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        url = urlparse(app.config['MODEL_SERVER_URL'])
+        timeout = app.config['MODEL_SERVER_TIMEOUT']
+        if url.scheme == 'unix':
+            conn = UnixHTTPConnection(url.path, timeout)
+        else:
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        _local.conn = conn
+    return conn
+
+
+# Errors of a keep-alive connection the server closed while it was idle. Only these
+# are retried, and only on a reused connection: a timeout or a new connection failing
+# means the server is busy or down, and retrying would run the batch twice.
+RECONNECT_ERRORS = (http.client.RemoteDisconnected, http.client.NotConnected, BrokenPipeError,
+                    ConnectionResetError)
+
+
+def drop_connection(conn):
+    conn.close()
+    _local.conn = None
+
+
+def call(operation, items, *params):
+    body = json.dumps({'items': list(items), 'params': list(params)})
+    for attempt in range(2):
+        conn = connection()
+        reused = conn.sock is not None
+        try:
+            conn.request('POST', f'/{operation}', body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            data = json.loads(response.read() or b'{}')
+            break
+        except RECONNECT_ERRORS as e:
+            drop_connection(conn)
+            if attempt or not reused:
+                raise ModelServerError(f'Model server unavailable: {e}')
+        except (http.client.HTTPException, OSError, ValueError) as e:
+            drop_connection(conn)
+            raise ModelServerError(f'Model server unavailable: {e}')
+    if response.status != 200:
+        raise ModelServerError(data.get('error') or f'Model server returned {response.status}')
+    return data['results']
+
+
+def remote(operation):
+    # A stand-in for a module's local batch function that runs it on the server.
+    def compute(items, *params):
+        return call(operation, items, *params)
+    return compute
+
+
+def operations():
+    # Imported here: the model modules import this one for their client side.
+    from functools import partial
+    from app import embeddings, senti_analysis, summarization, tags
+    from app.model_registry import get_model
+
+    def embed(texts):
+        return [embeddings.encode(vector) for vector in get_model('keywords').model.embed(texts)]
+
+    return {
+        'summarize': partial(summarization._generate_summaries, batch_size=summarization.SUMMARY_BATCH_SIZE),
+        'keywords': tags._generate_tags_batch,
+        'sentiment': senti_analysis._senti_analysis_batch,
+        'sentiment_chunks': senti_analysis._senti_analysis_chunks,
+        'embed': embed,
+    }
+
+
+class Request:
+    def __init__(self, items, params):
+        self.items = items
+        self.params = params
+        self.future = Future()
+
+
+class Batcher:
+    # Collects the requests for one operation. After the first one arrives it waits
+    # up to max_wait seconds, or until max_batch items are queued, and runs them all
+    # as one call; requests with different parameters are run as separate calls.
+    def __init__(self, name, compute, max_batch, max_wait):
+        self.name = name
+        self.compute = compute
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name=f'model-server-{name}', daemon=True)
+        self.thread.start()
+
+    def submit(self, items, params):
+        request = Request(items, tuple(params))
+        self.queue.put(request)
+        return request.future
+
+    def collect(self):
+        batch = [self.queue.get()]
+        size = len(batch[0].items)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def run(self):
+        while True:
+            groups = {}
+            for request in self.collect():
+                groups.setdefault(request.params, []).append(request)
+            for params, requests in groups.items():
+                items = [item for request in requests for item in request.items]
+                start = time.perf_counter()
+                try:
+                    results = self.compute(items, *params)
+                except Exception as e:
+                    logger.exception('Model server %s batch failed', self.name)
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                logger.info('%s: %d items from %d requests in %.2fs', self.name, len(items), len(requests),
+                            time.perf_counter() - start)
+                offset = 0
+                for request in requests:
+                    request.future.set_result(results[offset:offset + len(request.items)])
+                    offset += len(request.items)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    batchers = {}
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self.send_json(404, {'error': 'Not found'})
+        from app.model_registry import LOADERS, is_loaded, model_id
+        self.send_json(200, {'models': {name: model_id(name) for name in LOADERS},
+                             'loaded': [name for name in LOADERS if is_loaded(name)]})
+
+    def do_POST(self):
+        # The body is read first so the keep-alive connection stays in sync on errors.
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        batcher = self.batchers.get(self.path.lstrip('/'))
+        if batcher is None:
+            return self.send_json(404, {'error': f'Unknown operation {self.path}'})
+        try:
+            payload = json.loads(body)
+            items, params = payload['items'], payload.get('params', [])
+        except (ValueError, KeyError, TypeError):
+            return self.send_json(400, {'error': 'Expected a JSON body with items and params'})
+        try:
+            results = batcher.submit(items, params).result()
+        except Exception as e:
+            return self.send_json(500, {'error': str(e)})
+        self.send_json(200, {'results': results})
+
+    def address_string(self):
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class ThreadingTCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(url):
+    Handler.batchers = {name: Batcher(name, compute, app.config['MODEL_SERVER_MAX_BATCH'],
+                                      app.config['MODEL_SERVER_MAX_WAIT'])
+                        for name, compute in operations().items()}
+    url = urlparse(url)
+    if url.scheme == 'unix':
+        if os.path.exists(url.path):
+            os.unlink(url.path)
+        server = ThreadingUnixHTTPServer(url.path, Handler)
+    else:
+        server = ThreadingTCPHTTPServer((url.hostname or '127.0.0.1', url.port or 80), Handler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if url.scheme == 'unix' and os.path.exists(url.path):
+            os.unlink(url.path)
@@ -33,6 +33,7 @@ class Folder(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     articles = db.relationship('Article', backref='folder', lazy=True, cascade='all, delete')
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    __table_args__ = (db.Index('ix_folders_user_id_id', 'user_id', 'id'),)
 
     def __repr__(self):
         return f"<Folder(id={self.id}, name={self.name}, user_id={self.user_id})>"
@@ -47,14 +48,101 @@ class Article(db.Model):
     senti_score = db.Column(db.Float, nullable=False)
     senti_label = db.Column(db.String(100), nullable=False)
     tags = db.Column(db.String(200))
+    embedding = db.Column(db.LargeBinary)
+    summary_embedding = db.Column(db.LargeBinary)
+    simhash = db.Column(db.BigInteger)
+    domain = db.Column(db.String(255))
+    # Deferred: only reprocessing and re-summarizing read the stored text.
+    content = db.deferred(db.Column(db.LargeBinary))
+    content_hash = db.Column(db.String(64))
+    fingerprints = db.relationship('ArticleFingerprint', backref='article', lazy=True, cascade='all, delete-orphan')
+    tag_links = db.relationship('ArticleTag', backref='article', lazy=True, cascade='all, delete-orphan')
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     folder_id = db.Column(db.Integer, db.ForeignKey('folders.id'), nullable=False)
+    __table_args__ = (db.Index('ix_article_url_user_folder', 'url', 'user_id', 'folder_id'),
+                      db.Index('ix_article_folder_id_id', 'folder_id', 'id'),
+                      # Covering indexes for the sentiment aggregates in app/analytics.py.
+                      db.Index('ix_article_user_sentiment', 'user_id', 'folder_id', 'senti_label', 'senti_score'),
+                      db.Index('ix_article_user_domain', 'user_id', 'domain', 'senti_label', 'senti_score', 'date'),
+                      db.Index('ix_article_user_date', 'user_id', 'date', 'senti_label', 'senti_score'))
 
     def __repr__(self):
         return f"<Article(id={self.id}, title={self.title}, user_id={self.user_id}, folder_id={self.folder_id})>"
 
 
+class ArticleFingerprint(db.Model):
+    __tablename__ = 'article_fingerprints'
+    id = db.Column(db.Integer, primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('article.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    band = db.Column(db.Integer, nullable=False)
+    value = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index('ix_article_fingerprints_lookup', 'user_id', 'band', 'value'),)
+
+    def __repr__(self):
+        return f"<ArticleFingerprint(article_id={self.article_id}, band={self.band}, value={self.value})>"
+
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False, unique=True, index=True)
 
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name={self.name})>"
+
+
+class ArticleTag(db.Model):
+    # Inverted index from tags to articles. user_id is copied from the article so a
+    # user's tag lookups and tag counts are range scans on ix_article_tags_user_tag.
+    __tablename__ = 'article_tags'
+    article_id = db.Column(db.Integer, db.ForeignKey('article.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    tag = db.relationship('Tag')
+    __table_args__ = (db.Index('ix_article_tags_user_tag', 'user_id', 'tag_id', 'article_id'),)
 
+    def __repr__(self):
+        return f"<ArticleTag(article_id={self.article_id}, tag_id={self.tag_id})>"
 
 
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    payload = db.Column(db.JSON, nullable=False)
+    results = db.Column(db.JSON)
+    # Encoded extracted texts by content_hash, read only when results are saved.
+    texts = db.deferred(db.Column(db.JSON))
+    errors = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, status={self.status}, user_id={self.user_id})>"
+
+
+class StoredResult(db.Model):
+    __tablename__ = 'result_store'
+    token = db.Column(db.String(32), primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    def __repr__(self):
+        return f"<StoredResult(token={self.token}, user_id={self.user_id}, expires_at={self.expires_at})>"
+
+
+class RateLimit(db.Model):
+    # Token bucket state shared by every web process and host (app/newsapi.py).
+    # updated_at is Unix time, since monotonic clocks differ between processes.
+    __tablename__ = 'rate_limits'
+    name = db.Column(db.String(64), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<RateLimit(name={self.name}, tokens={self.tokens})>"
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+from app import app, db
+from app.models import RateLimit
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 256
+
+
+class NewsAPIError(Exception):
+    pass
+
+
+class TokenBucket:
+    # Refills at `rate` tokens per second up to `capacity`; one token per upstream request.
+    # The bucket is a row in rate_limits and each token is taken by a single conditional
+    # UPDATE, so all web processes and hosts share one quota.
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+
+    def try_acquire(self):
+        now = time.time()
+        refilled = case((RateLimit.tokens + (now - RateLimit.updated_at) * self.rate > self.capacity, self.capacity),
+                        else_=RateLimit.tokens + (now - RateLimit.updated_at) * self.rate)
+        try:
+            taken = RateLimit.query.filter(RateLimit.name == self.name, refilled >= 1) \
+                .update({'tokens': refilled - 1, 'updated_at': now}, synchronize_session=False)
+            if not taken and db.session.get(RateLimit, self.name) is None:
+                db.session.add(RateLimit(name=self.name, tokens=self.capacity - 1, updated_at=now))
+                taken = 1
+            db.session.commit()
+        except IntegrityError:
+            # Another process created the row first; take the token from it instead.
+            db.session.rollback()
+            return self.try_acquire()
+        return bool(taken)
+
+    def drain(self):
+        RateLimit.query.filter(RateLimit.name == self.name) \
+            .update({'tokens': 0, 'updated_at': time.time()}, synchronize_session=False)
+        db.session.commit()
+
+
+_session = None
+_bucket = None
+_setup_lock = threading.Lock()
+# (keyword, sources) -> (fetched_at, articles), least recently used first. Each
+# process keeps its own; the request quota is shared through the rate_limits table.
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+
+def get_session():
+    global _session
+    with _setup_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_maxsize=4))
+            session.mount('http://', HTTPAdapter(pool_maxsize=4))
+            _session = session
+        return _session
+
+
+def get_bucket():
+    global _bucket
+    with _setup_lock:
+        if _bucket is None:
+            _bucket = TokenBucket('newsapi', app.config['NEWSAPI_REQUESTS_PER_DAY'] / 86400,
+                                  app.config['NEWSAPI_BURST'])
+        return _bucket
+
+
+def cache_key(keyword, sources):
+    return (keyword or '').strip().lower(), tuple(sorted(sources))
+
+
+def cache_get(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def cache_put(key, articles):
+    with _cache_lock:
+        _cache[key] = (time.time(), articles)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def fetch(keyword, sources):
+    # Each upstream call spends one token, so the quota holds however often users search.
+    if not get_bucket().try_acquire():
+        raise NewsAPIError('News search limit reached, please try again later')
+    params = {'q': keyword or '', 'sources': ','.join(sources)}
+    try:
+        response = get_session().get(app.config['NEWSAPI_URL'], params=params,
+                                     headers={'X-Api-Key': app.config['NEWSAPI_KEY'] or ''},
+                                     timeout=app.config['NEWSAPI_TIMEOUT'])
+    except requests.exceptions.RequestException as e:
+        raise NewsAPIError(f'Error retrieving news: {str(e)}')
+    if response.status_code == 429:
+        get_bucket().drain()
+        raise NewsAPIError('News search limit reached, please try again later')
+    try:
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise NewsAPIError(f'Error retrieving news: {str(e)}')
+    content_type = response.headers.get('Content-Type', '')
+    if 'application/json' not in content_type:
+        raise NewsAPIError(f'Invalid content type: {content_type}')
+    try:
+        return response.json().get('articles', [])
+    except ValueError as e:
+        raise NewsAPIError(f'Error parsing JSON: {str(e)}')
+
+
+def refresh(key, keyword, sources):
+    articles = fetch(keyword, sources)
+    cache_put(key, articles)
+    return articles
+
+
+def refresh_in_background(key, keyword, sources):
+    with _cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        with app.app_context():
+            try:
+                refresh(key, keyword, sources)
+            except NewsAPIError as e:
+                logger.warning('Background refresh of news search %r failed: %s', key, e)
+            finally:
+                with _cache_lock:
+                    _refreshing.discard(key)
+
+    threading.Thread(target=run, name='newsapi-refresh', daemon=True).start()
+
+
+def search(keyword, sources):
+    # Fresh results come from the cache. Stale ones are still served at once while a
+    # background request refreshes them, so a slow upstream never holds up the page.
+    key = cache_key(keyword, sources)
+    entry = cache_get(key)
+    if entry is not None:
+        age = time.time() - entry[0]
+        if age < app.config['NEWSAPI_CACHE_TTL']:
+            return entry[1]
+        if age < app.config['NEWSAPI_CACHE_TTL'] + app.config['NEWSAPI_STALE_TTL']:
+            refresh_in_background(key, keyword, sources)
+            return entry[1]
+    return refresh(key, keyword, sources)
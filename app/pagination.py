@@ -0,0 +1,20 @@
+from flask import request
+from app import app
+
+
+def page_args():
+    # ?after=<id>&limit=<n>; the limit is capped so one request stays cheap.
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', default=app.config['PAGE_SIZE'], type=int)
+    return after, max(1, min(limit, app.config['PAGE_SIZE_MAX']))
+
+
+def keyset_page(query, column, after=None, limit=None):
+    # Keyset (cursor) pagination: each page starts right after the last id of the
+    # previous one, so deep pages cost the same indexed range scan as the first.
+    limit = limit or app.config['PAGE_SIZE']
+    if after is not None:
+        query = query.filter(column > after)
+    rows = query.order_by(column).limit(limit + 1).all()
+    next_cursor = getattr(rows[limit - 1], column.key) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,202 @@
+from itertools import chain
+from sqlalchemy.orm import load_only
+from app import app
+from app import result_cache, embeddings, fingerprint, stored_text
+from app.database import chunks
+from app.fetch import iter_fetched
+from app.model_registry import MODEL_IDS, model_id
+from app.models import Article
+from app.summarization import SUMMARY_BATCH_SIZE, generate_summaries
+from app.senti_analysis import sentiment_batch, sentiment_mode
+from app.tags import generate_tags_batch
+
+
+def article_metadata(url, article, simhash):
+    author = article.authors
+    date = article.date_publish
+    return {
+        'url': url,
+        'title': article.title,
+        'author': author[0] if author else 'Unknown',
+        'date': str(date) if date else None,
+        'simhash': simhash,
+        'content_hash': stored_text.content_hash(article.maintext)
+    }
+
+
+class StoredArticle:
+    # Stands in for a news-please article when the text was saved by an earlier run.
+    def __init__(self, article):
+        self.title = article.title
+        self.authors = [article.author] if article.author else []
+        self.date_publish = article.date
+        self.maintext = stored_text.decompress(article.content)
+
+
+def stored_articles(user_id, urls):
+    # The newest saved copy of each URL whose extracted text is stored.
+    stored = {}
+    for part in chunks(urls):
+        for article in Article.query.options(load_only(Article.url, Article.title, Article.author, Article.date,
+                                                       Article.content)) \
+                .filter(Article.user_id == user_id, Article.url.in_(part),
+                        Article.content.isnot(None)).order_by(Article.id):
+            stored[article.url] = StoredArticle(article)
+    return stored
+
+
+def run_models(contents, max_count, min_count):
+    # (summary, sentiment, tags, embedding, summary_embedding) for each text.
+    summaries = generate_summaries(contents, max_count, min_count)
+    tags, doc_embeddings = generate_tags_batch(contents)
+    summary_embeddings = [embeddings.encode(vector) for vector in embeddings.embed(summaries)] if summaries else []
+    return list(zip(summaries, sentiment_batch(contents, summaries), tags, doc_embeddings, summary_embeddings))
+
+
+def build_result(url, article, simhash, summary, sentiment, tags, embedding, summary_embedding):
+    return dict(article_metadata(url, article, simhash),
+                summary=summary,
+                senti_score=sentiment['score'],
+                senti_label=sentiment['label'],
+                senti_distribution=sentiment.get('distribution'),
+                tags=tags,
+                embedding=embedding,
+                summary_embedding=summary_embedding)
+
+
+def saved_article_result(article):
+    return {
+        'url': article.url,
+        'summary': article.summary,
+        'senti_score': article.senti_score,
+        'senti_label': article.senti_label,
+        'tags': article.tags,
+        'embedding': embeddings.encode(embeddings.from_bytes(article.embedding)) if article.embedding else None,
+        'summary_embedding': embeddings.encode(embeddings.from_bytes(article.summary_embedding))
+        if article.summary_embedding else None
+    }
+
+
+def reuse_result(url, article, simhash, source):
+    # A near-duplicate keeps its own URL and metadata but borrows the model outputs.
+    return dict(article_metadata(url, article, simhash),
+                summary=source['summary'],
+                senti_score=source['senti_score'],
+                senti_label=source['senti_label'],
+                senti_distribution=source.get('senti_distribution'),
+                tags=source['tags'],
+                embedding=source.get('embedding'),
+                summary_embedding=source.get('summary_embedding'),
+                duplicate_of=source['url'])
+
+
+def url_cache_key(url, max_count, min_count):
+    model_ids = ','.join(model_id(name) for name in sorted(MODEL_IDS))
+    return result_cache.make_key('article', model_ids, url, max_count, min_count, sentiment_mode())
+
+
+def text_cache_key(content_hash):
+    return result_cache.make_key('text', '', content_hash)
+
+
+def find_duplicate(simhash, results, user_id, url=None):
+    for result in results:
+        if result.get('simhash') is not None and fingerprint.is_near_duplicate(result['simhash'], simhash):
+            return result
+    if user_id is not None:
+        # A saved copy of the same URL is not reused: submitting it again asks for
+        # new outputs, e.g. with other summary lengths.
+        saved = fingerprint.find_saved_duplicate(user_id, simhash, exclude_url=url)
+        if saved is not None:
+            return saved_article_result(saved)
+    return None
+
+
+def run_pipeline(urls, max_count, min_count, on_result=None, user_id=None, max_in_flight=None, texts=None):
+    # Results are published in the order their articles finish, so the first one
+    # is available after a single article's latency rather than the whole job's.
+    # The extracted texts are kept out of the results, which are streamed and
+    # cached; if a texts dict is given it collects them, encoded, by content_hash
+    # for whoever saves the results.
+    results = []
+    errors = []
+
+    def finish(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(results)
+
+    # Repeat submissions of a URL with the same settings are answered from the
+    # cache without fetching the page again. The text is cached apart from the
+    # result, by content_hash; if it is gone the page is fetched after all.
+    pending = []
+    for url in urls:
+        cached = result_cache.get('article', url_cache_key(url, max_count, min_count)) \
+            if result_cache.enabled() else None
+        if cached is not None and texts is not None:
+            encoded = result_cache.get('text', text_cache_key(cached.get('content_hash')))
+            if encoded is None:
+                cached = None
+            else:
+                texts.setdefault(cached['content_hash'], encoded)
+        if cached is not None:
+            finish(cached)
+        else:
+            pending.append(url)
+
+    # URLs the user saved before are summarized again from their stored text, without
+    # downloading the page; they go first, in batches of SUMMARY_BATCH_SIZE.
+    stored = stored_articles(user_id, pending) if user_id is not None else {}
+    batches = iter_fetched([url for url in pending if url not in stored], max_in_flight=max_in_flight)
+    stored = [(url, article, None) for url, article in stored.items()]
+    batches = chain((stored[start:start + SUMMARY_BATCH_SIZE] for start in range(0, len(stored), SUMMARY_BATCH_SIZE)),
+                    batches)
+
+    # Whatever finished downloading while the models were busy is summarized as
+    # one batch: the first article runs alone, later ones are batched together.
+    for ready in batches:
+        fetched = []
+        duplicates = []
+        for url, article, error in ready:
+            if error is not None:
+                errors.append(f'{url}: {str(error)}')
+            elif not article.maintext:
+                errors.append(f'{url}: no article text found')
+            else:
+                if texts is not None:
+                    texts.setdefault(stored_text.content_hash(article.maintext), stored_text.encode(article.maintext))
+                # Near-duplicates of an article already done in this job or already saved
+                # by the user reuse its outputs; duplicates within this batch wait for
+                # the first copy to be processed.
+                simhash = fingerprint.simhash(article.maintext)
+                source = find_duplicate(simhash, results, user_id, url)
+                if source is not None:
+                    finish(reuse_result(url, article, simhash, source))
+                elif any(fingerprint.is_near_duplicate(simhash, other) for _, _, other in fetched):
+                    duplicates.append((url, article, simhash))
+                else:
+                    fetched.append((url, article, simhash))
+
+        outputs = run_models([article.maintext for _, article, _ in fetched], max_count, min_count)
+        for (url, article, simhash), article_outputs in zip(fetched, outputs):
+            try:
+                result = build_result(url, article, simhash, *article_outputs)
+            except Exception as e:
+                errors.append(f'{url}: {str(e)}')
+                continue
+            if result_cache.enabled():
+                result_cache.put('text', text_cache_key(result['content_hash']),
+                                 texts[result['content_hash']] if texts is not None
+                                 else stored_text.encode(article.maintext),
+                                 ttl=app.config['RESULT_CACHE_URL_TTL'])
+                result_cache.put('article', url_cache_key(url, max_count, min_count), result,
+                                 ttl=app.config['RESULT_CACHE_URL_TTL'])
+            finish(result)
+
+        for url, article, simhash in duplicates:
+            source = find_duplicate(simhash, results, None)
+            if source is None:
+                errors.append(f'{url}: duplicate article could not be processed')
+                continue
+            finish(reuse_result(url, article, simhash, source))
+    return results, errors
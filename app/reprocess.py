@@ -0,0 +1,81 @@
+import json
+import os
+from sqlalchemy.orm import undefer
+from app import data_dir, db, embeddings, stored_text, tag_index, vector_index
+from app.model_registry import MODEL_IDS, model_id
+from app.models import Article
+from app.pipeline import run_models
+from app.senti_analysis import sentiment_mode
+
+CHECKPOINT_PATH = os.path.join(data_dir, 'reprocess.json')
+
+
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(state):
+    # Written to a temporary file and renamed, so a crash never leaves half a checkpoint.
+    tmp_path = CHECKPOINT_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def clear_checkpoint():
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+
+def reprocess(max_count, min_count, batch_size, user_id=None, restart=False, on_batch=None):
+    # Runs the models again over every stored article text, in id order and
+    # batch_size articles at a time. After each committed batch the last article id
+    # is checkpointed, so an interrupted run resumes where it stopped; a checkpoint
+    # written with other settings or models is ignored. Copies of one text (the same
+    # page saved in several folders) share a content_hash and run the models once.
+    settings = {'max_count': max_count, 'min_count': min_count, 'user_id': user_id,
+                'models': [model_id(name) for name in sorted(MODEL_IDS)], 'sentiment': sentiment_mode()}
+    checkpoint = None if restart else load_checkpoint()
+    if checkpoint is None or checkpoint.get('settings') != settings:
+        checkpoint = {'settings': settings, 'last_id': 0, 'processed': 0}
+    query = Article.query.options(undefer(Article.content)).filter(Article.content.isnot(None))
+    if user_id is not None:
+        query = query.filter(Article.user_id == user_id)
+    total = query.count()
+
+    while True:
+        articles = query.filter(Article.id > checkpoint['last_id']).order_by(Article.id).limit(batch_size).all()
+        if not articles:
+            break
+        texts = {}
+        for article in articles:
+            texts.setdefault(article.content_hash or article.id, article.content)
+        outputs = dict(zip(texts, run_models([stored_text.decompress(content) for content in texts.values()],
+                                             max_count, min_count)))
+        for article in articles:
+            summary, sentiment, tags, embedding, summary_embedding = outputs[article.content_hash or article.id]
+            article.summary = summary
+            article.senti_label = sentiment['label']
+            article.senti_score = sentiment['score']
+            article.tags = tags
+            article.embedding = embeddings.decode(embedding)
+            article.summary_embedding = embeddings.decode(summary_embedding)
+        tag_index.index_tags([(article.id, article.user_id, article.tags) for article in articles])
+        db.session.commit()
+        by_user = {}
+        for article in articles:
+            by_user.setdefault(article.user_id, []).append(article)
+        for owner, owned in by_user.items():
+            vector_index.index_articles(owner, owned)
+
+        checkpoint['last_id'] = articles[-1].id
+        checkpoint['processed'] += len(articles)
+        save_checkpoint(checkpoint)
+        if on_batch is not None:
+            on_batch(checkpoint['processed'], total)
+    clear_checkpoint()
+    return checkpoint['processed'], total
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from app import app
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at);
+"""
+
+# Fraction of entries dropped once the cache grows past RESULT_CACHE_MAX_BYTES.
+EVICT_FRACTION = 0.1
+EVICT_CHECK_EVERY = 50
+
+_local = threading.local()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+_puts = 0
+
+
+def enabled():
+    return app.config['RESULT_CACHE_ENABLED']
+
+
+def get_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(app.config['RESULT_CACHE_PATH'], timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def make_key(namespace, model_id, content, *params):
+    digest = hashlib.sha256()
+    for part in (namespace, model_id, content) + params:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _count(namespace, hit):
+    with _stats_lock:
+        _stats[namespace]['hits' if hit else 'misses'] += 1
+
+
+def get(namespace, key):
+    now = time.time()
+    conn = get_connection()
+    row = conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+    if row is None or (row[1] is not None and row[1] < now):
+        _count(namespace, False)
+        return None
+    conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+    _count(namespace, True)
+    return json.loads(row[0])
+
+
+def put(namespace, key, value, ttl=None):
+    global _puts
+    data = json.dumps(value)
+    now = time.time()
+    conn = get_connection()
+    conn.execute('INSERT OR REPLACE INTO cache (key, namespace, value, size, accessed_at, expires_at) '
+                 'VALUES (?, ?, ?, ?, ?, ?)',
+                 (key, namespace, data, len(data), now, now + ttl if ttl else None))
+    _puts += 1
+    if _puts % EVICT_CHECK_EVERY == 0:
+        evict()
+
+
+def evict():
+    conn = get_connection()
+    total, count = conn.execute('SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache').fetchone()
+    if total <= app.config['RESULT_CACHE_MAX_BYTES']:
+        return 0
+    limit = max(1, int(count * EVICT_FRACTION))
+    conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)', (limit,))
+    logger.info('Evicted %d result cache entries', limit)
+    return limit
+
+
+def clear():
+    get_connection().execute('DELETE FROM cache')
+    with _stats_lock:
+        _stats.clear()
+
+
+def stats():
+    with _stats_lock:
+        return {namespace: dict(counts) for namespace, counts in _stats.items()}
+
+
+def cached_call(namespace, model_id, compute, content, *params):
+    if not enabled():
+        return compute(content, *params)
+    key = make_key(namespace, model_id, content, *params)
+    value = get(namespace, key)
+    if value is None:
+        value = compute(content, *params)
+        put(namespace, key, value)
+    return value
+
+
+def cached_batch(namespace, model_id, compute, contents, *params):
+    # Looks every item up first and passes only the misses to compute() as one batch.
+    if not enabled():
+        return compute(contents, *params)
+    keys = [make_key(namespace, model_id, content, *params) for content in contents]
+    values = [get(namespace, key) for key in keys]
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        computed = compute([contents[i] for i in missing], *params)
+        for i, value in zip(missing, computed):
+            values[i] = value
+            put(namespace, keys[i], value)
+    return values
@@ -0,0 +1,36 @@
+import secrets
+from datetime import datetime, timedelta
+from app import app, db
+from app.models import StoredResult
+
+
+def put(user_id, payload, ttl=None):
+    purge_expired()
+    token = secrets.token_urlsafe(16)
+    ttl = ttl if ttl is not None else app.config['RESULT_STORE_TTL']
+    db.session.add(StoredResult(token=token, user_id=user_id, payload=payload,
+                                expires_at=datetime.now() + timedelta(seconds=ttl)))
+    db.session.commit()
+    return token
+
+
+def get(token, user_id):
+    if not token:
+        return None
+    stored = StoredResult.query.filter(StoredResult.token == token, StoredResult.user_id == user_id,
+                                       StoredResult.expires_at >= datetime.now()).first()
+    return stored.payload if stored is not None else None
+
+
+def update(token, user_id, payload):
+    StoredResult.query.filter_by(token=token, user_id=user_id).update({'payload': payload})
+    db.session.commit()
+
+
+def delete(token):
+    StoredResult.query.filter_by(token=token).delete()
+    db.session.commit()
+
+
+def purge_expired():
+    StoredResult.query.filter(StoredResult.expires_at < datetime.now()).delete()
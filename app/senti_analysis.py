@@ -1,15 +1,116 @@
-from transformers import pipeline
+import re
+from app import app, model_server
+from app.model_registry import get_model, model_id
+from app.result_cache import cached_call, cached_batch
+from app.summarization import spread_evenly
+from app import metrics
 
-senti_model = pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment")
+LABEL_MAP = {
+    'LABEL_0': 'Negative',
+    'LABEL_1': 'Neutral',
+    'LABEL_2': 'Positive'
+}
+MAX_INPUT_TOKENS = 512
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
 
 def senti_analysis(content):
-    result = senti_model(content)
-    label_map = {
-        'LABEL_0': 'Negative',
-        'LABEL_1': 'Neutral',
-        'LABEL_2': 'Positive'
-    }
-    label = label_map[result[0]['label']]
-    score = round(result[0]['score'], 3)
+    with metrics.timed('sentiment'):
+        compute = remote_senti_analysis if model_server.enabled() else _senti_analysis
+        label, score = cached_call('sentiment', model_id('sentiment'), compute, content)
     return label, score
 
+def _senti_analysis(content):
+    return _senti_analysis_batch([content])[0]
+
+def remote_senti_analysis(content):
+    # The server batches single-summary calls from all workers together.
+    return tuple(model_server.call('sentiment', [content])[0])
+
+def _senti_analysis_batch(contents):
+    senti_model = get_model('sentiment')
+    results = senti_model(contents, batch_size=app.config['SENTIMENT_BATCH_SIZE'],
+                          truncation=True, max_length=MAX_INPUT_TOKENS)
+    return [(LABEL_MAP[result['label']], round(result['score'], 3)) for result in results]
+
+def senti_analysis_batch(contents):
+    if not contents:
+        return []
+    with metrics.timed('sentiment'):
+        compute = model_server.remote('sentiment') if model_server.enabled() else _senti_analysis_batch
+        # Same cache entries as senti_analysis(): the key does not depend on the batch.
+        results = cached_batch('sentiment', model_id('sentiment'), compute, contents)
+    return [{'label': label, 'score': score} for label, score in results]
+
+def sentiment_batch(contents, summaries):
+    # SENTIMENT_MODE 'chunks' scores the full article texts chunk by chunk, 'summary'
+    # mode the generated summaries; either way in one batched model call.
+    if app.config['SENTIMENT_MODE'] == 'chunks':
+        return senti_analysis_chunks(contents)
+    return senti_analysis_batch(summaries)
+
+def sentiment_mode():
+    if app.config['SENTIMENT_MODE'] != 'chunks':
+        return 'summary'
+    return f"chunks:{app.config['SENTIMENT_CHUNK_WORDS']}:{app.config['SENTIMENT_MAX_CHUNKS']}"
+
+def split_chunks(text, max_words, max_chunks):
+    # Whole sentences are packed into chunks of up to max_words words; a longer
+    # sentence is cut into word windows.
+    chunks = []
+    current = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        words = sentence.split()
+        if current and len(current) + len(words) > max_words:
+            chunks.append(' '.join(current))
+            current = []
+        while len(words) > max_words:
+            chunks.append(' '.join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+    if current:
+        chunks.append(' '.join(current))
+    return spread_evenly(chunks, max_chunks)
+
+def senti_analysis_chunks(contents):
+    if not contents:
+        return []
+    with metrics.timed('sentiment'):
+        compute = model_server.remote('sentiment_chunks') if model_server.enabled() else _senti_analysis_chunks
+        return cached_batch('sentiment_chunks', f"{model_id('sentiment')}|{sentiment_mode()}", compute, contents)
+
+def _senti_analysis_chunks(contents):
+    config = app.config
+    chunks = []
+    owners = []
+    for i, content in enumerate(contents):
+        parts = split_chunks(content, config['SENTIMENT_CHUNK_WORDS'], config['SENTIMENT_MAX_CHUNKS']) or ['']
+        chunks.extend(parts)
+        owners.extend([i] * len(parts))
+
+    # Every chunk of every article goes through the pipeline in one call. Sorting by
+    # length keeps the padding inside each batch small.
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    senti_model = get_model('sentiment')
+    outputs = senti_model([chunks[i] for i in order], batch_size=config['SENTIMENT_BATCH_SIZE'],
+                          truncation=True, max_length=MAX_INPUT_TOKENS, top_k=None)
+    scores = [None] * len(chunks)
+    for i, output in zip(order, outputs):
+        scores[i] = {LABEL_MAP[item['label']]: item['score'] for item in output}
+
+    # Per article: the chunks' label probabilities averaged with word-count weights.
+    totals = [dict.fromkeys(LABEL_MAP.values(), 0.0) for _ in contents]
+    weights = [0] * len(contents)
+    counts = [0] * len(contents)
+    for owner, chunk, chunk_scores in zip(owners, chunks, scores):
+        weight = max(1, len(chunk.split()))
+        for label, score in chunk_scores.items():
+            totals[owner][label] += score * weight
+        weights[owner] += weight
+        counts[owner] += 1
+    results = []
+    for total, weight, count in zip(totals, weights, counts):
+        distribution = {label: round(value / weight, 3) for label, value in total.items()}
+        label = max(distribution, key=distribution.get)
+        results.append({'label': label, 'score': distribution[label], 'distribution': distribution,
+                        'chunks': count})
+    return results
@@ -0,0 +1,28 @@
+import base64
+import hashlib
+import zlib
+
+# Extracted article text is stored zlib-compressed next to the article (news text
+# compresses about 3x), so it can be summarized again without fetching the page.
+LEVEL = 6
+
+
+def compress(text):
+    return zlib.compress(text.encode('utf-8'), LEVEL)
+
+
+def decompress(data):
+    return zlib.decompress(data).decode('utf-8') if data else None
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def encode(text):
+    # Compressed and base64-encoded while it travels inside JSON job results.
+    return base64.b64encode(compress(text)).decode('ascii')
+
+
+def decode(value):
+    return base64.b64decode(value) if value else None
@@ -1,11 +1,89 @@
-from transformers import BartTokenizer, BartForConditionalGeneration
-tokenizer = BartTokenizer.from_pretrained('facebook/bart-large-cnn')
-summary_model = BartForConditionalGeneration.from_pretrained('facebook/bart-large-cnn')
+from functools import partial
+from app import app, metrics, model_server
+from app.model_registry import get_model, model_id
+from app.result_cache import cached_batch
+
+SUMMARY_BATCH_SIZE = 8
+MAX_INPUT_TOKENS = 1024
+NUM_BEAMS = 5
 
 def generate_summary(content, max_count, min_count):
-    inputs = tokenizer.encode("summarize: " + content, return_tensors="pt",
-                              max_length=1024, truncation=True)
-    summary_ids = summary_model.generate(inputs, max_length=max_count, min_length=min_count,
-                                        num_beams=5, early_stopping=True)
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary
\ No newline at end of file
+    return generate_summaries([content], max_count, min_count)[0]
+
+def generate_summaries(contents, max_count, min_count, batch_size=SUMMARY_BATCH_SIZE):
+    if not contents:
+        return []
+    compute = model_server.remote('summarize') if model_server.enabled() \
+        else partial(_generate_summaries, batch_size=batch_size)
+    with metrics.timed('summarize'):
+        return cached_batch('summary', f"{model_id('summarizer')}|{long_doc_mode()}",
+                            compute, contents, max_count, min_count)
+
+def long_doc_mode():
+    config = app.config
+    if not config['LONG_DOC_ENABLED']:
+        return 'truncate'
+    return (f"long:{config['LONG_DOC_OVERLAP']}:{config['LONG_DOC_MAX_CHUNKS']}:"
+            f"{config['LONG_DOC_CHUNK_BEAMS']}:{config['LONG_DOC_CHUNK_MAX_LENGTH']}")
+
+def spread_evenly(items, count):
+    # Keeps count items spread evenly from the first to the last, so a chunk budget
+    # covers the whole document instead of only its start.
+    if len(items) <= count:
+        return items
+    if count <= 1:
+        return items[:1]
+    return [items[round(i * (len(items) - 1) / (count - 1))] for i in range(count)]
+
+def split_windows(ids, window, overlap, max_chunks):
+    # ids is a full encoding <s> ... </s>; each window keeps those special tokens.
+    bos, body, eos = ids[:1], ids[1:-1], ids[-1:]
+    size = window - 2
+    stride = max(1, size - overlap)
+    starts = [0]
+    while starts[-1] + size < len(body):
+        starts.append(starts[-1] + stride)
+    return [bos + body[start:start + size] + eos for start in spread_evenly(starts, max_chunks)]
+
+def _generate(tokenizer, summary_model, encoded, max_length, min_length, num_beams, batch_size):
+    # Batch inputs of similar token length together so little of each batch is padding.
+    order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+    summaries = [None] * len(encoded)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        inputs = tokenizer.pad({'input_ids': [encoded[i] for i in batch]}, return_tensors="pt")
+        summary_ids = summary_model.generate(inputs['input_ids'], attention_mask=inputs['attention_mask'],
+                                             max_length=max_length, min_length=min_length,
+                                             num_beams=num_beams, early_stopping=True)
+        for i, ids in zip(batch, summary_ids):
+            summaries[i] = tokenizer.decode(ids, skip_special_tokens=True)
+    return summaries
+
+def _generate_summaries(contents, max_count, min_count, batch_size):
+    tokenizer, summary_model = get_model('summarizer')
+    config = app.config
+    long_doc = config['LONG_DOC_ENABLED']
+    encoded = tokenizer(["summarize: " + content for content in contents],
+                        max_length=None if long_doc else MAX_INPUT_TOKENS, truncation=not long_doc)['input_ids']
+
+    # Map step: documents longer than the model's input are cut into overlapping
+    # windows, and the windows of every long document are summarized as one batch.
+    chunks = []
+    owners = []
+    for i, ids in enumerate(encoded):
+        if len(ids) > MAX_INPUT_TOKENS:
+            windows = split_windows(ids, MAX_INPUT_TOKENS, config['LONG_DOC_OVERLAP'], config['LONG_DOC_MAX_CHUNKS'])
+            chunks.extend(windows)
+            owners.extend([i] * len(windows))
+    if chunks:
+        chunk_max = config['LONG_DOC_CHUNK_MAX_LENGTH']
+        partials = _generate(tokenizer, summary_model, chunks, chunk_max, min(min_count, chunk_max),
+                             config['LONG_DOC_CHUNK_BEAMS'], batch_size)
+        # Reduce step: the joined partial summaries replace the original input.
+        joined = {}
+        for owner, summary in zip(owners, partials):
+            joined.setdefault(owner, []).append(summary)
+        for owner, parts in joined.items():
+            encoded[owner] = tokenizer(' '.join(parts), max_length=MAX_INPUT_TOKENS, truncation=True)['input_ids']
+
+    return _generate(tokenizer, summary_model, encoded, max_count, min_count, NUM_BEAMS, batch_size)
@@ -0,0 +1,73 @@
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.database import chunks
+from app.models import Article, ArticleTag, Tag
+
+MAX_TAG_LENGTH = 64
+
+
+def parse_tags(text):
+    # Article.tags keeps the comma-separated text as entered; the index stores each
+    # tag once, lower-cased and trimmed.
+    tags = []
+    for tag in (text or '').split(','):
+        tag = ' '.join(tag.split()).lower()[:MAX_TAG_LENGTH]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def tag_ids(names):
+    # Creates missing tags without failing when another request adds the same one.
+    names = set(names)
+    ids = {}
+    for part in chunks(names):
+        ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(part)).all())
+    missing = [{'name': name} for name in names if name not in ids]
+    if missing:
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            db.session.execute(dialect_insert(Tag).on_conflict_do_nothing(index_elements=['name']), missing)
+        else:
+            db.session.execute(insert(Tag), missing)
+        for part in chunks(row['name'] for row in missing):
+            ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(part)).all())
+    return ids
+
+
+def index_tags(articles):
+    # articles is a list of (article_id, user_id, tags text); their index rows are
+    # replaced with bulk statements. The caller commits.
+    parsed = {article_id: (user_id, parse_tags(text)) for article_id, user_id, text in articles}
+    if not parsed:
+        return
+    ids = tag_ids(name for _, names in parsed.values() for name in names)
+    for part in chunks(parsed):
+        ArticleTag.query.filter(ArticleTag.article_id.in_(part)).delete(synchronize_session=False)
+    rows = [{'article_id': article_id, 'tag_id': ids[name], 'user_id': user_id}
+            for article_id, (user_id, names) in parsed.items() for name in names]
+    if rows:
+        db.session.execute(insert(ArticleTag), rows)
+
+
+def filter_by_tag(query, user_id, name):
+    tags = parse_tags(name)
+    tag = Tag.query.filter_by(name=tags[0]).first() if tags else None
+    if tag is None:
+        return query.filter(db.false())
+    return query.join(ArticleTag, ArticleTag.article_id == Article.id) \
+        .filter(ArticleTag.user_id == user_id, ArticleTag.tag_id == tag.id)
+
+
+def tag_counts(user_id, folder_id=None, limit=50):
+    # Counted with GROUP BY over the (user_id, tag_id) index; names are joined afterwards.
+    counts = db.session.query(ArticleTag.tag_id, func.count().label('count')) \
+        .filter(ArticleTag.user_id == user_id)
+    if folder_id:
+        counts = counts.join(Article, Article.id == ArticleTag.article_id).filter(Article.folder_id == folder_id)
+    counts = counts.group_by(ArticleTag.tag_id).subquery()
+    rows = db.session.query(Tag.name, counts.c.count).join(counts, counts.c.tag_id == Tag.id) \
+        .order_by(counts.c.count.desc(), Tag.name).limit(limit).all()
+    return [{'tag': name, 'count': count} for name, count in rows]
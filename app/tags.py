@@ -1,8 +1,30 @@
-from keybert import KeyBERT
+from app.model_registry import get_model, model_id
+from app.result_cache import cached_batch
+from app import embeddings, metrics, model_server
+
+KEYWORD_OPTIONS = {'keyphrase_ngram_range': (1, 1), 'stop_words': 'english'}
 
-kw_model = KeyBERT(model='all-MiniLM-L6-v2')
 def generate_tags(content):
-    keywords = kw_model.extract_keywords(content, keyphrase_ngram_range=(1, 1),
-                                         stop_words='english', top_n=3)
-    tags = ', '.join([kw[0] for kw in keywords])
-    return tags
+    tags, _ = generate_tags_batch([content])
+    return tags[0]
+
+def generate_tags_batch(contents):
+    # Returns the tags of each document and its base64 float32 document embedding.
+    if not contents:
+        return [], []
+    with metrics.timed('keywords'):
+        compute = model_server.remote('keywords') if model_server.enabled() else _generate_tags_batch
+        values = cached_batch('keywords', model_id('keywords'), compute, contents)
+    return [value['tags'] for value in values], [value['embedding'] for value in values]
+
+def _generate_tags_batch(contents):
+    kw_model = get_model('keywords')
+    # One embedding pass over all documents and the union of their candidate words,
+    # instead of re-embedding the vocabulary for every document.
+    doc_embeddings, word_embeddings = kw_model.extract_embeddings(contents, **KEYWORD_OPTIONS)
+    keywords = kw_model.extract_keywords(contents, doc_embeddings=doc_embeddings,
+                                         word_embeddings=word_embeddings, top_n=3, **KEYWORD_OPTIONS)
+    if len(contents) == 1:
+        keywords = [keywords]
+    return [{'tags': ', '.join([kw[0] for kw in doc_keywords]), 'embedding': embeddings.encode(embedding)}
+            for doc_keywords, embedding in zip(keywords, doc_embeddings)]
@@ -0,0 +1,90 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text, or_
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import Article
+
+# FTS5 marks matches with these control characters; they are swapped for <mark>
+# tags only after the surrounding article text has been HTML-escaped.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+SEARCH_SQL = """
+SELECT article.id,
+       highlight(article_fts, 0, :start, :end) AS title,
+       snippet(article_fts, 1, :start, :end, '...', 32) AS summary,
+       highlight(article_fts, 2, :start, :end) AS tags,
+       bm25(article_fts, 5.0, 1.0, 3.0) AS rank
+FROM article_fts JOIN article ON article.id = article_fts.rowid
+WHERE article_fts MATCH :query AND article.user_id = :user_id {filters}
+ORDER BY rank
+LIMIT :limit
+"""
+
+
+def match_expression(query):
+    # Every word must appear; the last one also matches as a prefix while typing.
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(value):
+    if not value:
+        return ''
+    return Markup(str(escape(value)).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def like_search(user_id, query, folder_id=None, label=None, limit=20):
+    # Fallback for server databases, which have no article_fts table: every word
+    # must appear in the title, summary or tags, newest articles first.
+    words = re.findall(r'\w+', query)
+    if not words:
+        return []
+    articles = Article.query.options(joinedload(Article.folder)).filter(Article.user_id == user_id)
+    for word in words:
+        pattern = f'%{word}%'
+        articles = articles.filter(or_(Article.title.ilike(pattern), Article.summary.ilike(pattern),
+                                       Article.tags.ilike(pattern)))
+    if folder_id:
+        articles = articles.filter(Article.folder_id == folder_id)
+    if label:
+        articles = articles.filter(Article.senti_label == label)
+    return [{
+        'article': article,
+        'title': article.title,
+        'snippet': article.summary,
+        'tags': article.tags,
+        'score': ''
+    } for article in articles.order_by(Article.id.desc()).limit(limit).all()]
+
+
+def search(user_id, query, folder_id=None, label=None, limit=20):
+    if db.engine.dialect.name != 'sqlite':
+        return like_search(user_id, query, folder_id=folder_id, label=label, limit=limit)
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    params = {'query': expression, 'user_id': user_id, 'limit': limit, 'start': MATCH_START, 'end': MATCH_END}
+    filters = ''
+    if folder_id:
+        filters += ' AND article.folder_id = :folder_id'
+        params['folder_id'] = folder_id
+    if label:
+        filters += ' AND article.senti_label = :label'
+        params['label'] = label
+    rows = db.session.execute(text(SEARCH_SQL.format(filters=filters)), params).all()
+    articles = {article.id: article for article in
+                Article.query.options(joinedload(Article.folder))
+                .filter(Article.id.in_([row.id for row in rows])).all()}
+    return [{
+        'article': articles[row.id],
+        'title': highlight(row.title),
+        'snippet': highlight(row.summary),
+        'tags': highlight(row.tags),
+        'score': round(-row.rank, 3)
+    } for row in rows]
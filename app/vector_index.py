@@ -0,0 +1,371 @@
+import fcntl
+import logging
+import os
+import struct
+import threading
+from contextlib import contextmanager
+import numpy as np
+from app import app, data_dir, db
+from app import embeddings
+from app.models import Article
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DIR = os.path.join(data_dir, 'vectors')
+# Delta log record: operation, article id and vector length, then the vector.
+RECORD = struct.Struct('<Bqi')
+UPSERT = 1
+REMOVE = 2
+ITEM_SIZE = np.dtype(embeddings.DTYPE).itemsize
+KMEANS_ITERATIONS = 10
+ASSIGN_CHUNK_ROWS = 8192
+
+
+def nearest_centroids(vectors, centroids):
+    # Chunked so the rows x centroids score matrix stays small for large indexes.
+    return np.concatenate([np.argmax(vectors[start:start + ASSIGN_CHUNK_ROWS] @ centroids.T, axis=1)
+                           for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS)])
+
+
+def kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids)
+        for c in range(clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-12)
+    return centroids, nearest_centroids(vectors, centroids)
+
+
+def as_matrix(vectors, rows):
+    if not rows:
+        return np.empty((0, 0), dtype=embeddings.DTYPE)
+    return np.asarray(vectors, dtype=embeddings.DTYPE).reshape(rows, -1)
+
+
+def file_stamp(path):
+    # Every write replaces the file, so the inode changes even when two writes land
+    # within one mtime tick.
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class VectorIndex:
+    """Cosine-similarity index over one user's article summary embeddings.
+
+    Below IVF_MIN_ROWS every query is a brute-force matrix product. Larger indexes
+    are partitioned with k-means (an IVF index) and a query only scores the rows of
+    its IVF_NPROBE closest partitions.
+
+    The index is a base .npz file, sorted by article id, plus an append-only delta
+    log of upserts and removals, so a save costs one small append whatever the size
+    of the library. Once the log holds VECTOR_DELTA_MAX_ROWS records it is folded
+    into a new base file in the background (or by `flask reindex`). Writers hold an
+    flock on a sidecar .lock file; readers replay only the records appended since
+    they last looked, and reload everything after another process compacted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.delta_path = os.path.splitext(path)[0] + '.delta'
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = as_matrix([], 0)
+        self.alive = np.empty(0, dtype=bool)
+        self.centroids = None
+        self.assignments = None
+        self.trained_rows = 0
+        self.delta = {}
+        self.delta_records = 0
+        self.delta_cache = None
+        self.stamp = None
+        self.delta_inode = None
+        self.offset = 0
+        self.lock = threading.Lock()
+        self.ready_lock = threading.Lock()
+        self.compact_lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self):
+        return int(self.alive.sum()) + len(self.delta)
+
+    @contextmanager
+    def write_lock(self):
+        # The thread lock orders this process's writers, the flock the other
+        # processes'; the index is brought up to date under both before it is modified.
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        # The base file, then the whole delta log replayed over it.
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = as_matrix([], 0)
+        self.centroids = self.assignments = None
+        self.trained_rows = 0
+        self.stamp = file_stamp(self.path)
+        if self.stamp is not None:
+            with np.load(self.path) as data:
+                self.ids = data['ids']
+                self.vectors = data['vectors']
+                self.centroids = data['centroids'] if 'centroids' in data else None
+                self.assignments = data['assignments'] if 'assignments' in data else None
+                self.trained_rows = int(data['trained_rows']) if 'trained_rows' in data else 0
+            if len(self.ids) and np.any(np.diff(self.ids) < 0):
+                # Files written before the delta log were not sorted by id.
+                order = np.argsort(self.ids, kind='stable')
+                self.ids, self.vectors = self.ids[order], self.vectors[order]
+                if self.assignments is not None:
+                    self.assignments = self.assignments[order]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.delta = {}
+        self.delta_records = 0
+        self.delta_cache = None
+        self.delta_inode = None
+        self.offset = 0
+        self.read_delta()
+
+    def read_delta(self):
+        # Applies the records appended since the last read. A record cut short (still
+        # being written, or by a crash) is left for the next read.
+        try:
+            with open(self.delta_path, 'rb') as f:
+                self.delta_inode = os.fstat(f.fileno()).st_ino
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        position = 0
+        while position + RECORD.size <= len(data):
+            operation, article_id, size = RECORD.unpack_from(data, position)
+            end = position + RECORD.size + size * ITEM_SIZE
+            if end > len(data):
+                break
+            vector = np.frombuffer(data, embeddings.DTYPE, size, position + RECORD.size) if size else None
+            self.apply(operation, article_id, vector)
+            position = end
+        self.offset += position
+
+    def apply(self, operation, article_id, vector):
+        row = np.searchsorted(self.ids, article_id)
+        if row < len(self.ids) and self.ids[row] == article_id:
+            self.alive[row] = False
+        if operation == UPSERT:
+            self.delta[article_id] = vector
+        else:
+            self.delta.pop(article_id, None)
+        self.delta_records += 1
+        self.delta_cache = None
+
+    def refresh(self):
+        # Another process compacting replaces the base file and the delta log; anything
+        # else is new records at the end of the log.
+        delta = file_stamp(self.delta_path)
+        replaced = delta is not None and self.delta_inode is not None and delta[0] != self.delta_inode
+        if file_stamp(self.path) != self.stamp or replaced or (delta is None and self.offset) \
+                or (delta is not None and delta[2] < self.offset):
+            self.load()
+        elif delta is not None and delta[2] > self.offset:
+            self.read_delta()
+
+    def delta_arrays(self):
+        if self.delta_cache is None:
+            ids = np.fromiter(self.delta, dtype=np.int64, count=len(self.delta))
+            self.delta_cache = ids, as_matrix(np.concatenate(list(self.delta.values())) if self.delta else [],
+                                              len(ids))
+        return self.delta_cache
+
+    def append(self, records):
+        # Called under write_lock: one write, so a reader never sees half a batch
+        # followed by another writer's records.
+        with open(self.delta_path, 'ab') as f:
+            f.write(b''.join(records))
+        self.read_delta()
+
+    def upsert(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = as_matrix(vectors, len(ids))
+        with self.write_lock():
+            self.append([RECORD.pack(UPSERT, article_id, len(vector)) + vector.tobytes()
+                         for article_id, vector in zip(ids.tolist(), vectors)])
+        self.maybe_compact()
+
+    def remove(self, ids):
+        with self.write_lock():
+            known = [article_id for article_id in np.asarray(ids, dtype=np.int64).tolist()
+                     if article_id in self.delta or self.contains_base(article_id)]
+            if not known:
+                return
+            self.append([RECORD.pack(REMOVE, article_id, 0) for article_id in known])
+        self.maybe_compact()
+
+    def contains_base(self, article_id):
+        row = np.searchsorted(self.ids, article_id)
+        return row < len(self.ids) and self.ids[row] == article_id and self.alive[row]
+
+    def maybe_compact(self):
+        if self.delta_records >= app.config['VECTOR_DELTA_MAX_ROWS'] and self.compact_lock.acquire(blocking=False):
+            def run():
+                try:
+                    self.compact()
+                except Exception:
+                    logger.exception('Compacting %s failed', self.path)
+                finally:
+                    self.compact_lock.release()
+            threading.Thread(target=run, name='vector-index-compact', daemon=True).start()
+
+    def compact(self):
+        # Folds the delta log into a new base file. New rows join their nearest
+        # partitions, and the partitions are retrained once the index has doubled.
+        with self.write_lock():
+            if not self.delta_records:
+                return
+            delta_ids, delta_vectors = self.delta_arrays()
+            ids = np.concatenate([self.ids[self.alive], delta_ids])
+            parts = [part for part in (self.vectors[self.alive], delta_vectors) if len(part)]
+            vectors = np.concatenate(parts) if parts else as_matrix([], 0)
+            assignments = None
+            if self.centroids is not None:
+                new_assignments = nearest_centroids(delta_vectors, self.centroids) if len(delta_ids) \
+                    else np.empty(0, dtype=self.assignments.dtype)
+                assignments = np.concatenate([self.assignments[self.alive], new_assignments])
+            self.write_base(ids, vectors, assignments)
+
+    def rebuild(self, ids, vectors):
+        with self.write_lock():
+            ids = np.asarray(ids, dtype=np.int64)
+            self.centroids = None
+            self.write_base(ids, as_matrix(vectors, len(ids)), None)
+
+    def write_base(self, ids, vectors, assignments):
+        # Called under write_lock: saves ids, vectors and partitions as the new base
+        # file, sorted by id, and starts an empty delta log.
+        order = np.argsort(ids, kind='stable')
+        self.ids, self.vectors = ids[order], vectors[order]
+        self.assignments = assignments[order] if assignments is not None else None
+        if self.centroids is None or len(self.ids) > 2 * self.trained_rows:
+            self.train()
+        arrays = {'ids': self.ids, 'vectors': self.vectors, 'trained_rows': np.int64(self.trained_rows)}
+        if self.centroids is not None:
+            arrays['centroids'] = self.centroids
+            arrays['assignments'] = self.assignments
+        tmp_path = self.path + '.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.path)
+        # The log is replaced, not truncated, so readers notice by its inode.
+        tmp_path = self.delta_path + '.tmp'
+        open(tmp_path, 'wb').close()
+        os.replace(tmp_path, self.delta_path)
+        self.stamp = file_stamp(self.path)
+        self.delta_inode = os.stat(self.delta_path).st_ino
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.delta = {}
+        self.delta_records = 0
+        self.delta_cache = None
+        self.offset = 0
+
+    def train(self):
+        if len(self.ids) < app.config['IVF_MIN_ROWS']:
+            self.centroids = self.assignments = None
+            self.trained_rows = 0
+            return
+        clusters = max(1, int(np.sqrt(len(self.ids))))
+        self.centroids, self.assignments = kmeans(self.vectors, clusters)
+        self.trained_rows = len(self.ids)
+
+    def search(self, query, k=10, allowed_ids=None):
+        # allowed_ids restricts the candidates (e.g. to a folder) before the top k
+        # are picked, so a filtered search still finds k matches when they exist.
+        with self.lock:
+            self.refresh()
+            query = np.asarray(query, dtype=embeddings.DTYPE).ravel()
+            mask = self.alive if allowed_ids is None \
+                else self.alive & np.isin(self.ids, np.asarray(list(allowed_ids), dtype=np.int64))
+            rows = None
+            if self.centroids is not None:
+                nprobe = min(app.config['IVF_NPROBE'], len(self.centroids))
+                probed = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+                rows = np.flatnonzero(mask & np.isin(self.assignments, probed))
+                if len(rows) < k:
+                    # The probed partitions are emptied by removals or the filter; scan everything.
+                    rows = None
+            if rows is None and mask.all():
+                ids, scores = self.ids, self.vectors @ query if len(self.ids) else np.empty(0, dtype=query.dtype)
+            else:
+                rows = np.flatnonzero(mask) if rows is None else rows
+                ids, scores = self.ids[rows], self.vectors[rows] @ query if len(rows) else np.empty(0)
+            delta_ids, delta_vectors = self.delta_arrays()
+            if len(delta_ids):
+                keep = slice(None) if allowed_ids is None else np.isin(delta_ids, list(allowed_ids))
+                ids = np.concatenate([ids, delta_ids[keep]])
+                scores = np.concatenate([scores, delta_vectors[keep] @ query])
+            if not len(scores):
+                return [], []
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return ids[top].tolist(), scores[top].tolist()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_path(user_id):
+    return os.path.join(VECTOR_DIR, f'user_{user_id}.npz')
+
+
+def get_index(user_id):
+    # The global lock only guards the dict; loading or building one user's index
+    # holds that index's own lock, so other users' searches are not held up.
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = _indexes[user_id] = VectorIndex(index_path(user_id))
+    if not index.ready:
+        with index.ready_lock:
+            if not index.ready:
+                if os.path.exists(index.path) or os.path.exists(index.delta_path):
+                    with index.lock:
+                        index.load()
+                else:
+                    rebuild_index(user_id, index)
+                index.ready = True
+    return index
+
+
+def rebuild_index(user_id, index=None):
+    if index is None:
+        index = get_index(user_id)
+    rows = db.session.query(Article.id, Article.summary_embedding) \
+        .filter(Article.user_id == user_id, Article.summary_embedding.isnot(None)).all()
+    index.rebuild([article_id for article_id, _ in rows], [embeddings.from_bytes(vector) for _, vector in rows])
+    return index
+
+
+def index_articles(user_id, articles):
+    articles = [article for article in articles if article.summary_embedding]
+    if articles:
+        get_index(user_id).upsert([article.id for article in articles],
+                                  np.stack([embeddings.from_bytes(article.summary_embedding) for article in articles]))
+
+
+def remove_articles(user_id, article_ids):
+    if article_ids:
+        get_index(user_id).remove(article_ids)
+
+
+def search(user_id, text, k=10, allowed_ids=None):
+    query = embeddings.embed([text])[0]
+    return get_index(user_id).search(query, k, allowed_ids)
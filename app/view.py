@@ -1,20 +1,71 @@
-import os
+import hmac
+import json
+import time
 from app import app, db
-from newsplease import NewsPlease
 from app.form import (UrlForm, WordCountForm, LoginForm, RegistrationForm, StoreForm, FolderForm, EditArticleForm,
                       SearchForm)
-from flask import render_template, redirect, url_for, request, session, flash, jsonify
-import requests
+from flask import (render_template, redirect, url_for, request, session, flash, jsonify, Response,
+                   stream_with_context, g)
 from flask_login import current_user, login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash
-from app.summarization import generate_summary
-from app.senti_analysis import senti_analysis
-from app.tags import generate_tags
-from app.models import User, Article, Folder
-
-API_URL = 'https://newsapi.org/v2/everything?apiKey={api_key}&sources={sources}&q={keyword}'
-
-API_KEY = os.getenv("API_KEY")
+from app.jobs import submit_job, ensure_workers, PENDING, RUNNING, DONE, FAILED
+from app.models import User, Article, Folder, Job
+from sqlalchemy.orm import joinedload, selectinload
+from app import result_store, embeddings, vector_index, text_search, fingerprint, newsapi, ingest, stored_text
+from app import analytics, metrics, model_registry, result_cache, tag_index
+from app.pagination import keyset_page, page_args
+
+@app.before_request
+def start_job_workers():
+    ensure_workers()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.trace, g.trace_token = metrics.start_trace()
+
+@app.after_request
+def record_request_time(response):
+    if 'request_start' not in g:
+        return response
+    seconds = time.perf_counter() - g.request_start
+    metrics.end_trace(g.trace_token)
+    endpoint = request.endpoint or 'unknown'
+    metrics.http_request_seconds.observe(seconds, endpoint=endpoint, method=request.method,
+                                         status=response.status_code)
+    metrics.log_event('request', endpoint=endpoint, method=request.method, path=request.path,
+                      status=response.status_code, ms=round(seconds * 1000, 1), stages=g.trace.summary())
+    return response
+
+def metrics_allowed():
+    token = app.config['METRICS_TOKEN']
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if not metrics_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    queue = dict(db.session.query(Job.status, db.func.count(Job.id))
+                 .filter(Job.status.in_((PENDING, RUNNING))).group_by(Job.status).all())
+    cache_stats = result_cache.stats()
+    extra = [
+        metrics.render_gauge('job_queue_depth', 'Jobs waiting for or being processed by a worker.',
+                             {(('status', status),): queue.get(status, 0) for status in (PENDING, RUNNING)}),
+        metrics.render_gauge('model_load_seconds', 'Time taken to load each NLP model.',
+                             {(('model', name),): seconds for name, seconds in model_registry.load_times.items()}),
+        metrics.render_gauge('model_loaded', 'Whether each NLP model is loaded in this process.',
+                             {(('model', name),): int(model_registry.is_loaded(name)) for name in model_registry.LOADERS}),
+        metrics.render_gauge('result_cache_hits_total', 'Result cache hits.',
+                             {(('namespace', ns),): counts['hits'] for ns, counts in cache_stats.items()}, 'counter'),
+        metrics.render_gauge('result_cache_misses_total', 'Result cache misses.',
+                             {(('namespace', ns),): counts['misses'] for ns, counts in cache_stats.items()}, 'counter'),
+        metrics.render_gauge('result_cache_hit_ratio', 'Share of result cache lookups that were hits.',
+                             {(('namespace', ns),): round(counts['hits'] / max(counts['hits'] + counts['misses'], 1), 4)
+                              for ns, counts in cache_stats.items()}),
+    ]
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
 
 @app.route('/', methods=['GET', 'POST'])
 def login():
@@ -60,7 +111,6 @@ def summarization():
     urlform = UrlForm()
     count_form = WordCountForm()
     urls = []
-    results = []
     news_data = []
     error_message = None
     searchform = SearchForm()
@@ -83,31 +133,8 @@ def summarization():
 
         max_count = count_form.max_count.data
         min_count = count_form.min_count.data
-        for url in urls:
-            article = NewsPlease.from_url(url)
-            title = article.title
-            author = article.authors
-            the_author = author[0] if author else 'Unknown'
-            date = article.date_publish
-            content = article.maintext
-            summary = generate_summary(content, max_count, min_count)
-            tags = generate_tags(content)
-            label, score = senti_analysis(summary)
-            try:
-                results.append({
-                    'url': url,
-                    'title': title,
-                    'author': the_author,
-                    'date': date,
-                    'summary': summary,
-                    'senti_score': score,
-                    'senti_label': label,
-                    'tags': tags
-                })
-            except Exception as e:
-                flash(f'A result error occurred: {str(e)}', 'danger')
-
-        session['results'] = results
+        job = submit_job(current_user.id, urls, max_count, min_count)
+        session['job_id'] = job.id
         return redirect(url_for('result'))
 
     elif searchform.validate_on_submit():
@@ -115,29 +142,14 @@ def summarization():
         keyword = searchform.search.data
         selected_sources = request.form.getlist('sources')
 
-        sources_str = ','.join(selected_sources)
-
-        api_url = API_URL.format(api_key=API_KEY, sources=sources_str, keyword=keyword or "")
-
         try:
-            response = requests.get(api_url)
-            response.raise_for_status()
-            content_type = response.headers.get('Content-Type')
-
-            if 'application/json' in content_type:
-                articles = response.json().get('articles', [])
-                if articles:
-                    news_data = sorted(articles, key=lambda x: x['publishedAt'], reverse=True)
-                else:
-                    error_message = 'No articles found for the keyword.'
+            articles = newsapi.search(keyword, selected_sources)
+            if articles:
+                news_data = sorted(articles, key=lambda x: x['publishedAt'], reverse=True)
             else:
-                error_message = f'Invalid content type: {content_type}'
-                news_data = [{'title': 'Error', 'description': error_message, 'url': '#'}]
-        except requests.exceptions.RequestException as e:
-            error_message = f'Error retrieving news: {str(e)}'
-            news_data = [{'title': 'Error', 'description': error_message, 'url': '#'}]
-        except ValueError as e:
-            error_message = f'Error parsing JSON: {str(e)}'
+                error_message = 'No articles found for the keyword.'
+        except newsapi.NewsAPIError as e:
+            error_message = str(e)
             news_data = [{'title': 'Error', 'description': error_message, 'url': '#'}]
 
     return render_template('summarization.html', urlform=urlform, count_form=count_form, news=news_data,
@@ -147,65 +159,176 @@ def summarization():
 @app.route('/result', methods=['GET', "POST"])
 @login_required
 def result():
-    results = session.get('results', [])
+    job = None
+    if 'job_id' in session:
+        job = Job.query.filter_by(id=session['job_id'], user_id=current_user.id).first()
+    if job is not None and job.status in (PENDING, RUNNING):
+        return render_template('result.html', form=None, results=[], job=job)
+    results = job.results if job is not None and job.results else []
     form = StoreForm()
     replace_articles = []
     save_articles = []
     form.folder.choices = [(folder.id, folder.name) for folder in Folder.query.filter_by(user_id=current_user.id).all()]
 
     if form.validate_on_submit():
-        selected_articles = request.form.getlist('articles')
+        selected_articles = [results[int(index)] for index in request.form.getlist('articles')]
         folder_id = form.folder.data
-
-        for index in selected_articles:
-            article = results[int(index)]
+        # The same URL can be in a job twice (submitted twice, or a near-duplicate
+        # answer); only its first copy is saved, and the user is told.
+        duplicates = ingest.duplicate_urls(selected_articles)
+        if duplicates:
+            flash(f'Saved only the first copy of articles selected more than once: {", ".join(duplicates)}', 'warning')
+            seen = set()
+            selected_articles = [article for article in selected_articles
+                                 if article['url'] not in seen and not seen.add(article['url'])]
+        texts = (job.texts or {}) if selected_articles else {}
+
+        # One IN lookup for every selected URL instead of a query per article.
+        urls = {article['url'] for article in selected_articles}
+        existing = {article.url: article for article in Article.query.filter(
+            Article.user_id == current_user.id, Article.folder_id == folder_id, Article.url.in_(urls)).all()} \
+            if urls else {}
+        for article in selected_articles:
             article['folder_id'] = folder_id
-            exist_article = Article.query.filter_by(url=article['url'], user_id=current_user.id, folder_id=folder_id).first()
+            exist_article = existing.get(article['url'])
             if exist_article:
-                replace_articles.append({'new': article, 'old_id': exist_article.id})
+                replace_articles.append({'new': article, 'old_id': exist_article.id,
+                                         'content': texts.get(article.get('content_hash'))})
             else:
                 save_articles.append(article)
 
+        new_ids = []
         try:
-            for article in save_articles:
-                new_article = Article(
-                    url=article['url'],
-                    title=article['title'],
-                    author=article['author'],
-                    date=article['date'],
-                    summary=article['summary'],
-                    senti_score=article['senti_score'],
-                    senti_label=article['senti_label'],
-                    tags=article['tags'],
-                    user_id=current_user.id,
-                    folder_id=folder_id
-                )
-                db.session.add(new_article)
+            new_ids = ingest.save_articles(current_user.id, folder_id, save_articles, texts)
             db.session.commit()
             if save_articles:
-                flash(f'Selected new articles:{article['title']} have been stored successfully.', 'success')
+                flash(f'Selected new articles:{save_articles[-1]["title"]} have been stored successfully.', 'success')
         except Exception as e:
             db.session.rollback()
+            new_ids = []
             flash(f'An error occurred while storing new articles: {str(e)}', 'danger')
+        ingest.index_saved(current_user.id, new_ids)
 
         if replace_articles:
-            session['replace_articles'] = replace_articles
+            session['replace_token'] = result_store.put(current_user.id, replace_articles)
             return redirect(url_for('confirm_replace'))
 
         return redirect(url_for('result'))
-    return render_template('result.html', form=form, results=results)
+    return render_template('result.html', form=form, results=results, job=job)
+
+@app.route('/job/<int:job_id>/status', methods=['GET'])
+@login_required
+def job_status(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    status = {
+        'id': job.id,
+        'status': job.status,
+        'total': len(job.payload['urls']),
+        'completed': len(job.results or []),
+        'errors': job.errors or []
+    }
+    if job.payload.get('folder_id') is not None:
+        progress = job.results or {}
+        status['completed'] = progress.get('processed', 0) + progress.get('skipped', 0)
+        status['progress'] = progress
+    return jsonify(status)
+
+@app.route('/api/ingest', methods=['POST'])
+@login_required
+def ingest_urls():
+    # Takes JSON {"urls": [...], "folder_id": ...}, or a form upload with a `file` of
+    # URLs and a folder_id field, and queues a bulk ingest job.
+    data = request.get_json(silent=True) or request.form
+    if 'file' in request.files:
+        urls = ingest.parse_urls(request.files['file'].read().decode('utf-8', errors='replace'))
+    elif isinstance(data.get('urls'), list):
+        urls = ingest.parse_urls('\n'.join(str(url) for url in data['urls']))
+    else:
+        urls = ingest.parse_urls(data.get('urls'))
+    try:
+        folder_id = int(data.get('folder_id'))
+        max_count = int(data.get('max_count', 100))
+        min_count = int(data.get('min_count', 100))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'folder_id, max_count and min_count must be integers'}), 400
+    folder = Folder.query.filter_by(id=folder_id, user_id=current_user.id).first()
+    if folder is None:
+        return jsonify({'error': 'Folder not found'}), 404
+    if not urls:
+        return jsonify({'error': 'No URLs found'}), 400
+    if len(urls) > app.config['INGEST_MAX_URLS']:
+        return jsonify({'error': f"At most {app.config['INGEST_MAX_URLS']} URLs can be ingested at once"}), 400
+    if not (50 <= min_count <= 300 and 50 <= max_count <= 300):
+        return jsonify({'error': 'max_count and min_count must be between 50 and 300'}), 400
+    job = submit_job(current_user.id, urls, max_count, min_count, folder_id=folder.id)
+    return jsonify({'job_id': job.id, 'urls': len(urls),
+                    'status_url': url_for('job_status', job_id=job.id)}), 202
+
+@app.route('/job/<int:job_id>/stream', methods=['GET'])
+@login_required
+def job_stream(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    # Each result event carries its index as the event id; a reconnecting
+    # EventSource sends the last one it received and the stream resumes after it.
+    try:
+        start = max(int(request.headers.get('Last-Event-ID', -1)) + 1, 0)
+    except ValueError:
+        start = 0
+
+    # Bulk ingest jobs keep a progress dict rather than a result list; they send a
+    # progress event (the same counts as job_status) whenever it changes.
+    is_ingest = job.payload.get('folder_id') is not None
+
+    def events():
+        sent = start
+        progress = None
+        while True:
+            db.session.refresh(job)
+            if is_ingest:
+                if (job.results or {}) != progress:
+                    progress = job.results or {}
+                    yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+            else:
+                results = job.results or []
+                for index in range(sent, len(results)):
+                    row = {key: value for key, value in results[index].items()
+                           if key not in ('embedding', 'summary_embedding', 'simhash', 'content_hash')}
+                    yield f"id: {index}\nevent: result\ndata: {json.dumps(dict(row, index=index))}\n\n"
+                sent = len(results)
+            if job.status in (DONE, FAILED):
+                yield f"event: done\ndata: {json.dumps({'status': job.status, 'errors': job.errors or []})}\n\n"
+                break
+            # End the read transaction so the next refresh sees the worker's commits.
+            db.session.commit()
+            time.sleep(app.config['JOB_STREAM_INTERVAL'])
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/confirm_replace', methods=['GET', 'POST'])
 @login_required
 def confirm_replace():
-    replace_articles = session.get('replace_articles', [])
+    replace_token = session.get('replace_token')
+    replace_articles = result_store.get(replace_token, current_user.id) or []
+    if not replace_articles:
+        session.pop('replace_token', None)
+        return redirect(url_for('result'))
+    old_articles = {article.id: article for article in Article.query.options(joinedload(Article.folder)).filter(
+        Article.id.in_([item['old_id'] for item in replace_articles]), Article.user_id == current_user.id).all()}
+    folder_names = dict(db.session.query(Folder.id, Folder.name).filter(
+        Folder.id.in_({item['new']['folder_id'] for item in replace_articles})).all())
     for item in replace_articles:
-        item['old'] = Article.query.get(item['old_id'])
-        item['new_folder_name'] = Folder.query.get(item['new']['folder_id']).name
+        item['old'] = old_articles.get(item['old_id'])
+        item['new_folder_name'] = folder_names.get(item['new']['folder_id'])
+    replace_articles = [item for item in replace_articles if item['old'] is not None]
+    if not replace_articles:
+        result_store.delete(replace_token)
+        session.pop('replace_token', None)
+        return redirect(url_for('result'))
 
     if request.method == 'POST':
         current_article = replace_articles[0]
-        old_article = Article.query.get(current_article['old_id'])
+        old_article = current_article['old']
         new_article = current_article['new']
         confirm_key = f'confirm_{replace_articles.index(current_article)}'
 
@@ -217,12 +340,21 @@ def confirm_replace():
             old_article.senti_score = new_article['senti_score']
             old_article.senti_label = new_article['senti_label']
             old_article.tags = new_article['tags']
+            old_article.embedding = embeddings.decode(new_article.get('embedding'))
+            old_article.summary_embedding = embeddings.decode(new_article.get('summary_embedding'))
             old_article.folder_id = new_article['folder_id']
+            # The stored text is only rewritten when it changed.
+            if current_article.get('content') and old_article.content_hash != new_article['content_hash']:
+                old_article.content = stored_text.decode(current_article['content'])
+                old_article.content_hash = new_article['content_hash']
+            fingerprint.set_fingerprint(old_article, new_article.get('simhash'))
+            tag_index.index_tags([(old_article.id, old_article.user_id, old_article.tags)])
 
             db.session.add(old_article)
 
             try:
                 db.session.commit()
+                vector_index.index_articles(current_user.id, [old_article])
                 flash(f'Article "{old_article.title}" has been updated', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -234,10 +366,13 @@ def confirm_replace():
         replace_articles.pop(0)
 
         if replace_articles:
-            session['replace_articles'] = [{'new': item['new'], 'old_id': item['old_id']} for item in replace_articles]
+            result_store.update(replace_token, current_user.id,
+                                [{'new': item['new'], 'old_id': item['old_id'], 'content': item.get('content')}
+                                 for item in replace_articles])
             return redirect(url_for('confirm_replace'))
         else:
-            session.pop('replace_articles', None)
+            result_store.delete(replace_token)
+            session.pop('replace_token', None)
             return redirect(url_for('result'))
 
     return render_template('replace.html', replace_articles=replace_articles)
@@ -259,9 +394,9 @@ def my_article():
             flash(f'An error occurred: {str(e)}', 'danger')
 
 
-    folders = Folder.query.filter_by(user_id=current_user.id).all()
+    folders, next_cursor = keyset_page(Folder.query.filter_by(user_id=current_user.id), Folder.id, *page_args())
 
-    return render_template('myarticle.html', folders=folders, form=form)
+    return render_template('myarticle.html', folders=folders, form=form, next_cursor=next_cursor)
 
 @app.route('/folder/<int:folder_id>', methods=['GET'])
 @login_required
@@ -272,17 +407,81 @@ def view_folder(folder_id):
         flash('You do not have access to this folder.', 'danger')
         return redirect(url_for('my_article'))
 
-    articles = Article.query.filter_by(folder_id=folder.id).all()
+    tag = request.args.get('tag')
+    articles, next_cursor = keyset_page(folder_articles(folder, tag), Article.id, *page_args())
+    tags = tag_index.tag_counts(current_user.id, folder_id=folder.id, limit=app.config['TAG_CLOUD_SIZE'])
+
+    return render_template('view_folder.html', folder=folder, articles=articles, next_cursor=next_cursor,
+                           tag=tag, tags=tags)
+
+def folder_articles(folder, tag=None):
+    query = Article.query.filter_by(folder_id=folder.id)
+    if tag:
+        query = tag_index.filter_by_tag(query, current_user.id, tag)
+    return query
+
+def folder_json(folder):
+    return {
+        'id': folder.id,
+        'name': folder.name,
+        'created_at': folder.created_at.isoformat() if folder.created_at else None,
+        'url': url_for('view_folder', folder_id=folder.id),
+        'delete_url': url_for('delete_folder', folder_id=folder.id)
+    }
+
+def article_json(article):
+    return {
+        'id': article.id,
+        'url': article.url,
+        'title': article.title,
+        'author': article.author,
+        'date': article.date,
+        'summary': article.summary,
+        'tags': article.tags,
+        'senti_label': article.senti_label,
+        'senti_score': article.senti_score,
+        'folder_id': article.folder_id,
+        'edit_url': url_for('edit_article', article_id=article.id)
+    }
+
+@app.route('/api/folders', methods=['GET'])
+@login_required
+def list_folders():
+    folders, next_cursor = keyset_page(Folder.query.filter_by(user_id=current_user.id), Folder.id, *page_args())
+    return jsonify({'folders': [folder_json(folder) for folder in folders], 'next': next_cursor})
 
-    return render_template('view_folder.html', folder=folder, articles=articles)
+@app.route('/api/folders/<int:folder_id>/articles', methods=['GET'])
+@login_required
+def list_folder_articles(folder_id):
+    folder = Folder.query.filter_by(id=folder_id, user_id=current_user.id).first_or_404()
+    articles, next_cursor = keyset_page(folder_articles(folder, request.args.get('tag')), Article.id, *page_args())
+    return jsonify({'articles': [article_json(article) for article in articles], 'next': next_cursor})
+
+@app.route('/api/tags', methods=['GET'])
+@login_required
+def list_tags():
+    # Tag cloud: article counts per tag, for all of the user's articles or one folder.
+    folder_id = request.args.get('folder', type=int)
+    if folder_id is not None:
+        Folder.query.filter_by(id=folder_id, user_id=current_user.id).first_or_404()
+    limit = request.args.get('limit', default=app.config['TAG_CLOUD_SIZE'], type=int)
+    tags = tag_index.tag_counts(current_user.id, folder_id=folder_id,
+                                limit=max(1, min(limit, app.config['PAGE_SIZE_MAX'])))
+    return jsonify({'tags': tags})
 
 @app.route('/delete_folder/<int:folder_id>', methods=['POST'])
 @login_required
 def delete_folder(folder_id):
-    folder = Folder.query.get(folder_id)
+    # Load the articles, fingerprints and tag links up front so the delete cascade
+    # does not lazy-load them one article at a time.
+    folder = Folder.query.options(selectinload(Folder.articles).selectinload(Article.fingerprints),
+                                  selectinload(Folder.articles).selectinload(Article.tag_links)) \
+        .filter_by(id=folder_id, user_id=current_user.id).first_or_404()
+    article_ids = [article.id for article in folder.articles]
     try:
         db.session.delete(folder)
         db.session.commit()
+        vector_index.remove_articles(current_user.id, article_ids)
         flash('Folder deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -295,11 +494,14 @@ def delete_folder(folder_id):
 def delete_article():
     article_ids = request.form.getlist('article_ids')
     if article_ids:
-        articles_to_delete = Article.query.filter(Article.id.in_(article_ids)).all()
+        articles_to_delete = Article.query.options(selectinload(Article.fingerprints), selectinload(Article.tag_links)).filter(
+            Article.id.in_(article_ids), Article.user_id == current_user.id).all()
+        deleted_ids = [article.id for article in articles_to_delete]
         for article in articles_to_delete:
             db.session.delete(article)
         try:
             db.session.commit()
+            vector_index.remove_articles(current_user.id, deleted_ids)
             flash(f'Successfully deleted', 'success')
             return redirect(url_for('view_folder', folder_id=article.folder_id))
         except Exception as e:
@@ -314,6 +516,7 @@ def edit_article(article_id):
     form = EditArticleForm(tags=article.tags)
     if form.validate_on_submit():
         article.tags = form.tags.data
+        tag_index.index_tags([(article.id, article.user_id, article.tags)])
         db.session.commit()
         flash('Article tags updated.', 'success')
         return redirect(url_for('view_folder', folder_id=article.folder_id))
@@ -322,19 +525,73 @@ def edit_article(article_id):
 @app.route('/compare_articles', methods=['POST'])
 @login_required
 def compare_articles():
-    article_ids = request.form.getlist('article_ids')
-    if article_ids:
-        articles = Article.query.filter(Article.id.in_(article_ids)).all()
-        positive_articles = sorted([article for article in articles if article.senti_label == 'Positive'], key=lambda x: x.senti_score, reverse=True)
-        negative_articles = sorted([article for article in articles if article.senti_label == 'Negative'], key=lambda x: x.senti_score, reverse=True)
-        neutral_articles = sorted([article for article in articles if article.senti_label == 'Neutral'], key=lambda x: x.senti_score, reverse=True)
-
-    return render_template('compare.html', positive_articles=positive_articles,
-                           negative_articles=negative_articles, neutral_articles=neutral_articles)
-
-
-
-
-
-
-
+    article_ids = request.form.getlist('article_ids', type=int)
+    conditions = analytics.scope(current_user.id, article_ids=article_ids)
+    groups = {label: [] for label in analytics.LABELS}
+    for article in analytics.ranked_articles(conditions) if article_ids else []:
+        groups.setdefault(article.senti_label, []).append(article)
+    stats = {'summary': analytics.summary(conditions), 'distribution': analytics.distribution(conditions)} \
+        if article_ids else None
+
+    return render_template('compare.html', positive_articles=groups['Positive'],
+                           negative_articles=groups['Negative'], neutral_articles=groups['Neutral'], stats=stats)
+
+@app.route('/api/sentiment', methods=['GET'])
+@login_required
+def sentiment_stats():
+    # Sentiment aggregates for all of the user's articles or one folder (?folder=),
+    # optionally broken down with ?group=folder|domain|day|month|year. A folder or
+    # domain breakdown with ?period=day|month|year also gives each group its timeline.
+    folder_id = request.args.get('folder', type=int)
+    if folder_id is not None:
+        Folder.query.filter_by(id=folder_id, user_id=current_user.id).first_or_404()
+    conditions = analytics.scope(current_user.id, folder_id=folder_id)
+    group = request.args.get('group')
+    period = request.args.get('period')
+    if group and group not in ('folder', 'domain') and group not in analytics.PERIODS:
+        return jsonify({'error': 'group must be folder, domain, day, month or year'}), 400
+    if period and (period not in analytics.PERIODS or group not in ('folder', 'domain')):
+        return jsonify({'error': 'period must be day, month or year, with group=folder or group=domain'}), 400
+    limit = max(1, min(request.args.get('limit', default=app.config['PAGE_SIZE'], type=int),
+                       app.config['PAGE_SIZE_MAX']))
+    stats = {'summary': analytics.summary(conditions), 'distribution': analytics.distribution(conditions)}
+    if group == 'folder':
+        stats['groups'] = analytics.by_folder(conditions, limit, period)
+    elif group == 'domain':
+        stats['groups'] = analytics.by_domain(conditions, limit, period)
+    elif group in analytics.PERIODS:
+        stats['groups'] = analytics.timeline(conditions, group)
+    return jsonify(stats)
+
+@app.route('/search', methods=['GET'])
+@login_required
+def search_articles():
+    query = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'keyword')
+    folder_id = request.args.get('folder', type=int)
+    label = request.args.get('sentiment') or None
+    folders = Folder.query.filter_by(user_id=current_user.id).all()
+    matches = []
+    if query and mode == 'semantic':
+        filters = [Article.user_id == current_user.id]
+        if folder_id:
+            filters.append(Article.folder_id == folder_id)
+        if label:
+            filters.append(Article.senti_label == label)
+        # The folder and sentiment filters are applied inside the index, before the
+        # top results are picked, so they do not thin out the matches.
+        allowed_ids = {article_id for article_id, in db.session.query(Article.id).filter(*filters)} \
+            if folder_id or label else None
+        ids, scores = vector_index.search(current_user.id, query, k=app.config['SEARCH_RESULTS'],
+                                          allowed_ids=allowed_ids)
+        articles = {article.id: article for article in
+                    Article.query.options(joinedload(Article.folder)).filter(Article.id.in_(ids), *filters).all()}
+        matches = [{'article': articles[article_id], 'title': articles[article_id].title,
+                    'snippet': articles[article_id].summary, 'tags': articles[article_id].tags,
+                    'score': round(score, 3)}
+                   for article_id, score in zip(ids, scores) if article_id in articles]
+    elif query:
+        matches = text_search.search(current_user.id, query, folder_id=folder_id, label=label,
+                                     limit=app.config['SEARCH_RESULTS'])
+    return render_template('search.html', query=query, mode=mode, folders=folders, folder_id=folder_id,
+                           label=label, matches=matches)
@@ -0,0 +1,130 @@
+"""Compare the torch, quantized and onnx inference backends on the local corpus.
+
+Each backend runs in its own subprocess so load time and peak memory are measured
+in isolation. Summaries are scored with ROUGE-1/2/L F1 and sentiment labels with
+agreement against the fp32 torch backend.
+
+Usage: python benchmarks/bench_backends.py [--backends torch quantized onnx] [--json out.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import load_corpus, peak_rss_mb
+
+
+def run_backend(backend, max_count, min_count):
+    os.environ['INFERENCE_BACKEND'] = backend
+    from app.model_registry import warm_up
+    from app.summarization import generate_summary
+    from app.senti_analysis import senti_analysis
+
+    corpus = load_corpus()
+    load_seconds = warm_up(['summarizer', 'sentiment'])
+    summaries, labels, summary_times, sentiment_times = [], [], [], []
+    for _, text in corpus:
+        start = time.perf_counter()
+        summary = generate_summary(text, max_count, min_count)
+        summary_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        label, _ = senti_analysis(summary)
+        sentiment_times.append(time.perf_counter() - start)
+        summaries.append(summary)
+        labels.append(label)
+    return {
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'summary_ms_per_article': round(1000 * sum(summary_times) / len(corpus), 1),
+        'sentiment_ms_per_article': round(1000 * sum(sentiment_times) / len(corpus), 1),
+        'summaries': summaries,
+        'labels': labels,
+    }
+
+
+def ngrams(tokens, n):
+    return [tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    from collections import Counter
+    cand, ref = Counter(ngrams(candidate, n)), Counter(ngrams(reference, n))
+    return f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, ref_token in enumerate(reference):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    return f1(previous[-1], len(candidate), len(reference))
+
+
+def quality(result, baseline):
+    scores = {'rouge1': 0.0, 'rouge2': 0.0, 'rougeL': 0.0}
+    for candidate, reference in zip(result['summaries'], baseline['summaries']):
+        cand, ref = candidate.lower().split(), reference.lower().split()
+        scores['rouge1'] += rouge_n(cand, ref, 1)
+        scores['rouge2'] += rouge_n(cand, ref, 2)
+        scores['rougeL'] += rouge_l(cand, ref)
+    count = len(baseline['summaries'])
+    scores = {name: round(value / count, 3) for name, value in scores.items()}
+    agree = sum(a == b for a, b in zip(result['labels'], baseline['labels']))
+    scores['label_agreement'] = round(agree / count, 3)
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['torch', 'quantized', 'onnx'])
+    parser.add_argument('--max-count', type=int, default=100)
+    parser.add_argument('--min-count', type=int, default=50)
+    parser.add_argument('--json', help='write the full report to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.max_count, args.min_count)))
+        return
+
+    backends = args.backends if 'torch' in args.backends else ['torch'] + args.backends
+    results = {}
+    for backend in backends:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', backend,
+                               '--max-count', str(args.max_count), '--min-count', str(args.min_count)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f'{backend}: failed\n{proc.stderr.strip().splitlines()[-1]}', file=sys.stderr)
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    if 'torch' not in results:
+        sys.exit('The torch baseline failed, nothing to compare against.')
+    print(f"{'backend':<10} {'load s':>8} {'rss MB':>8} {'sum ms':>8} {'sent ms':>8} "
+          f"{'R-1':>6} {'R-2':>6} {'R-L':>6} {'labels':>7}")
+    for backend, result in results.items():
+        result['quality'] = quality(result, results['torch'])
+        q = result['quality']
+        print(f"{backend:<10} {sum(result['load_seconds'].values()):>8.1f} {result['peak_rss_mb']:>8.0f} "
+              f"{result['summary_ms_per_article']:>8.0f} {result['sentiment_ms_per_article']:>8.0f} "
+              f"{q['rouge1']:>6.3f} {q['rouge2']:>6.3f} {q['rougeL']:>6.3f} {q['label_agreement']:>7.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
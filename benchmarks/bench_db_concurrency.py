@@ -0,0 +1,149 @@
+"""Throughput and lock errors of the save, list and delete endpoints under concurrent load.
+
+Every thread logs in as its own user and keeps saving job results into a folder,
+listing the folder and deleting articles from it, the write pattern of several
+gunicorn workers sharing one database.
+
+Usage: python benchmarks/bench_db_concurrency.py [--threads 16] [--seconds 20]
+           [--database-url URL] [--journal-mode WAL] [--busy-timeout 15000] [--synchronous NORMAL]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import common
+
+OPERATIONS = (('save', 4), ('list', 4), ('page', 1), ('delete', 2))
+SAVE_SIZE = 5
+RESULTS_PER_JOB = 50
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def fake_results(count):
+    return [{'url': f'https://example.com/bench/{i}', 'title': f'Benchmark article {i}', 'author': 'Bench',
+             'date': None, 'summary': ' '.join(common.synthetic_articles(1, 60, seed=i)),
+             'senti_score': 0.5, 'senti_label': 'Neutral', 'tags': 'bench', 'simhash': None}
+            for i in range(count)]
+
+
+def setup(app, db, threads):
+    from flask_migrate import upgrade
+    from app.jobs import DONE
+    from app.models import User, Folder, Job
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(common.BENCH_DIR), 'migrations'))
+        accounts = []
+        for i in range(threads):
+            username = f'bench{i}_{int(time.time())}'
+            user = User(username=username[:20], email=f'{username}@example.com')
+            user.set_password('bench')
+            db.session.add(user)
+            db.session.flush()
+            folder = Folder(name='bench', user_id=user.id)
+            job = Job(user_id=user.id, status=DONE, payload={'urls': []}, results=fake_results(RESULTS_PER_JOB))
+            db.session.add_all([folder, job])
+            db.session.flush()
+            accounts.append((user.username, folder.id, job.id))
+        db.session.commit()
+    return accounts
+
+
+def run_client(app, account, deadline, timings, failures):
+    username, folder_id, job_id = account
+    client = app.test_client()
+    client.post('/', data={'username': username, 'password': 'bench'})
+    with client.session_transaction() as session:
+        session['job_id'] = job_id
+    rng = random.Random(username)
+    names, weights = zip(*OPERATIONS)
+    while time.perf_counter() < deadline:
+        operation = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        if operation == 'save':
+            selected = rng.sample(range(RESULTS_PER_JOB), SAVE_SIZE)
+            response = client.post('/result', data={'articles': [str(i) for i in selected], 'folder': folder_id})
+            # A failed save is rendered as a flash message rather than an error status.
+            if b'An error occurred' in client.get('/result').data:
+                failures['save'] += 1
+        elif operation == 'list':
+            response = client.get(f'/api/folders/{folder_id}/articles')
+        elif operation == 'page':
+            response = client.get(f'/folder/{folder_id}')
+        else:
+            listing = client.get(f'/api/folders/{folder_id}/articles?limit={SAVE_SIZE}').get_json()
+            ids = [str(article['id']) for article in listing['articles']]
+            response = client.post('/delete_articles', data={'article_ids': ids})
+        timings[operation].append(time.perf_counter() - start)
+        if response.status_code >= 500:
+            failures[operation] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--database-url', help='defaults to a new SQLite file in a temporary directory')
+    parser.add_argument('--journal-mode', default='WAL')
+    parser.add_argument('--busy-timeout', type=int, default=15000)
+    parser.add_argument('--synchronous', default='NORMAL')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tmp.name, 'bench.sqlite')
+    os.environ['SQLITE_JOURNAL_MODE'] = args.journal_mode
+    os.environ['SQLITE_BUSY_TIMEOUT'] = str(args.busy_timeout)
+    os.environ['SQLITE_SYNCHRONOUS'] = args.synchronous
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    from sqlalchemy import event
+    from app import app, db, vector_index
+    app.config['WTF_CSRF_ENABLED'] = False
+    # Keep the benchmark users' search indexes out of the real data directory.
+    vector_index.VECTOR_DIR = os.path.join(tmp.name, 'vectors')
+    accounts = setup(app, db, args.threads)
+
+    lock_errors = []
+    with app.app_context():
+        @event.listens_for(db.engine, 'handle_error')
+        def count_lock_errors(context):
+            if 'locked' in str(context.original_exception):
+                lock_errors.append(context.original_exception)
+
+    timings = defaultdict(list)
+    failures = defaultdict(int)
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=run_client, args=(app, account, deadline, timings, failures))
+               for account in accounts]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        print(f'database: {db.engine.url.render_as_string(hide_password=True)}')
+    print(f'threads: {args.threads}, journal_mode: {args.journal_mode}, busy_timeout: {args.busy_timeout} ms, '
+          f'synchronous: {args.synchronous}')
+    print(f"{'operation':<10} {'count':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+    for operation, _ in OPERATIONS:
+        values = timings[operation]
+        print(f'{operation:<10} {len(values):>7} {len(values) / elapsed:>8.1f} '
+              f'{percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} '
+              f'{failures[operation]:>7}')
+    total = sum(len(values) for values in timings.values())
+    print(f'total: {total} requests, {total / elapsed:.1f} req/s, {len(lock_errors)} "database is locked" errors')
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Latency and memory of long-document summarization versus document length.
+
+Runs each length in a fresh process, once with the chunked map-reduce mode and once
+with plain truncation at 1024 tokens, and reports wall time and peak RSS.
+
+Usage: python benchmarks/bench_long_documents.py [--words 500 1000 2000 4000 8000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import synthetic_articles, peak_rss_mb
+
+
+def run_one(words, long_doc, max_count, min_count):
+    os.environ['LONG_DOC_ENABLED'] = '1' if long_doc else '0'
+    from app.model_registry import get_model
+    from app.summarization import generate_summary
+    tokenizer, _ = get_model('summarizer')
+    text = synthetic_articles(1, words * 2, seed=words)[0]
+    text = ' '.join(text.split()[:words])
+    start = time.perf_counter()
+    generate_summary(text, max_count, min_count)
+    return {
+        'words': words,
+        'tokens': len(tokenizer(text)['input_ids']),
+        'mode': 'chunked' if long_doc else 'truncate',
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, nargs='+', default=[500, 1000, 2000, 4000, 8000])
+    parser.add_argument('--max-count', type=int, default=150)
+    parser.add_argument('--min-count', type=int, default=50)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        words, mode = args.child
+        print(json.dumps(run_one(int(words), mode == 'chunked', args.max_count, args.min_count)))
+        return
+
+    print(f"{'words':>6} {'tokens':>7} {'mode':>9} {'seconds':>8} {'rss MB':>8}")
+    for words in args.words:
+        for mode in ('truncate', 'chunked'):
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(words), mode,
+                                   '--max-count', str(args.max_count), '--min-count', str(args.min_count)],
+                                  capture_output=True, text=True, check=True)
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{row['words']:>6} {row['tokens']:>7} {row['mode']:>9} {row['seconds']:>8.2f} "
+                  f"{row['peak_rss_mb']:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
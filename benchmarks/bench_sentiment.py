@@ -0,0 +1,51 @@
+"""Compare summary sentiment (one model call per summary) with batched chunk-level sentiment.
+
+The summary path scores one short text per article per call. The chunk path scores
+every chunk of the full texts in a single pipeline call, at several batch sizes.
+Both run on the local corpus; summaries are stood in for by each article's first
+60 words so the summarizer is not part of the timing.
+
+Usage: python benchmarks/bench_sentiment.py [--repeat 3] [--batch-sizes 8 16 32 64]
+"""
+import argparse
+import time
+
+from common import load_corpus
+
+
+def timed(fn, repeat):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 16, 32, 64])
+    args = parser.parse_args()
+
+    from app import app
+    from app.senti_analysis import _senti_analysis, _senti_analysis_chunks, split_chunks
+
+    contents = [text for _, text in load_corpus()]
+    summaries = [' '.join(text.split()[:60]) for text in contents]
+    chunks = sum(len(split_chunks(text, app.config['SENTIMENT_CHUNK_WORDS'], app.config['SENTIMENT_MAX_CHUNKS']))
+                 for text in contents)
+    print(f'{len(contents)} articles, {chunks} chunks of up to {app.config["SENTIMENT_CHUNK_WORDS"]} words')
+    print(f"{'mode':<22} {'seconds':>8} {'articles/s':>11} {'chunks/s':>9}")
+
+    seconds = timed(lambda: [_senti_analysis(summary) for summary in summaries], args.repeat)
+    print(f"{'per-summary calls':<22} {seconds:>8.3f} {len(contents) / seconds:>11.2f} {'-':>9}")
+    with app.app_context():
+        for batch_size in args.batch_sizes:
+            app.config['SENTIMENT_BATCH_SIZE'] = batch_size
+            seconds = timed(lambda: _senti_analysis_chunks(contents), args.repeat)
+            print(f"{f'chunks, batch {batch_size}':<22} {seconds:>8.3f} {len(contents) / seconds:>11.2f} "
+                  f"{chunks / seconds:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Compare serial and batched BART summarization throughput on CPU.
+
+Usage: python benchmarks/bench_summarization.py [--articles 5] [--words 600] [--threads N]
+"""
+import argparse
+import time
+
+from common import synthetic_articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=5)
+    parser.add_argument('--words', type=int, default=600)
+    parser.add_argument('--max-count', type=int, default=100)
+    parser.add_argument('--min-count', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    from app.summarization import generate_summary, generate_summaries
+
+    articles = synthetic_articles(args.articles, args.words)
+    generate_summary(articles[0], args.max_count, args.min_count)  # warm-up
+
+    start = time.perf_counter()
+    for article in articles:
+        generate_summary(article, args.max_count, args.min_count)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_summaries(articles, args.max_count, args.min_count)
+    batched = time.perf_counter() - start
+
+    print(f'torch threads: {torch.get_num_threads()}')
+    print(f'serial : {serial:8.2f}s  {len(articles) / serial:6.3f} articles/sec')
+    print(f'batched: {batched:8.2f}s  {len(articles) / batched:6.3f} articles/sec')
+    print(f'speedup: {serial / batched:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
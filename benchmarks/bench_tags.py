@@ -0,0 +1,41 @@
+"""Compare per-article KeyBERT tagging with the shared batched embedding pass.
+
+Usage: python benchmarks/bench_tags.py [--repeat 3]
+"""
+import argparse
+import time
+
+from common import load_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from app.model_registry import get_model
+    from app.tags import KEYWORD_OPTIONS, generate_tags_batch
+
+    contents = [text for _, text in load_corpus()]
+    kw_model = get_model('keywords')
+    generate_tags_batch(contents[:1])  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for content in contents:
+            kw_model.extract_keywords(content, top_n=3, **KEYWORD_OPTIONS)
+    separate = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        generate_tags_batch(contents)
+    batched = (time.perf_counter() - start) / args.repeat
+
+    print(f'{len(contents)} articles')
+    print(f'separate calls: {separate:6.3f}s  {len(contents) / separate:7.2f} articles/sec')
+    print(f'batched       : {batched:6.3f}s  {len(contents) / batched:7.2f} articles/sec')
+    print(f'speedup       : {separate / batched:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
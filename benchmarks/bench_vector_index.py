@@ -0,0 +1,70 @@
+"""Build and query time of the semantic search index, brute force versus IVF.
+
+Usage: python benchmarks/bench_vector_index.py [--rows 100000] [--dim 384] [--queries 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the project on sys.path)
+import numpy as np
+
+
+def random_unit_vectors(rows, dim, rng):
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def time_queries(index, queries, k):
+    start = time.perf_counter()
+    results = [index.search(query, k)[0] for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    from app import app
+    from app.vector_index import VectorIndex
+
+    rng = np.random.default_rng(0)
+    vectors = random_unit_vectors(args.rows, args.dim, rng)
+    # Queries near stored vectors, like a search phrased after a saved summary.
+    queries = vectors[rng.choice(args.rows, args.queries)] + 0.3 * random_unit_vectors(args.queries, args.dim, rng)
+    ids = np.arange(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config['IVF_MIN_ROWS'] = args.rows + 1
+        brute = VectorIndex(os.path.join(tmp, 'brute.npz'))
+        start = time.perf_counter()
+        brute.rebuild(ids, vectors)
+        brute_build = time.perf_counter() - start
+        brute_ms, exact = time_queries(brute, queries, args.k)
+
+        app.config['IVF_MIN_ROWS'] = 1
+        ivf = VectorIndex(os.path.join(tmp, 'ivf.npz'))
+        start = time.perf_counter()
+        ivf.rebuild(ids, vectors)
+        ivf_build = time.perf_counter() - start
+        ivf_ms, approx = time_queries(ivf, queries, args.k)
+
+        start = time.perf_counter()
+        ivf.upsert([args.rows], vectors[:1])
+        upsert_ms = (time.perf_counter() - start) * 1000
+
+    # Share of queries whose exact nearest neighbour is among the IVF results.
+    recall = np.mean([e[0] in a for a, e in zip(approx, exact)])
+    print(f'{args.rows} rows x {args.dim} dims, {args.queries} queries, k={args.k}')
+    print(f'brute force: build {brute_build:6.2f}s  query {brute_ms:7.2f} ms')
+    print(f'ivf        : build {ivf_build:6.2f}s  query {ivf_ms:7.2f} ms  nearest-neighbour recall {recall:.3f}')
+    print(f'incremental upsert (including save): {upsert_ms:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+# Benchmarks time the models themselves, so the result cache must not answer for them.
+os.environ.setdefault('RESULT_CACHE_ENABLED', '0')
+
+WORDS = ('government market rate inflation bank report growth policy minister election company '
+         'shares investors economy trade energy prices climate health court police city council '
+         'analysts quarter percent year said officials week data announced plans').split()
+
+
+def load_corpus():
+    corpus = []
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.txt'):
+            with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+                corpus.append((name[:-4], f.read().strip()))
+    return corpus
+
+
+def corpus_texts(count, words):
+    # Deterministic real-language texts of a given length: corpus articles are
+    # concatenated in rotation, starting from a different article for each text.
+    corpus = [text for _, text in load_corpus()]
+    texts = []
+    for i in range(count):
+        tokens = []
+        j = i
+        while len(tokens) < words:
+            tokens.extend(corpus[j % len(corpus)].split())
+            j += 1
+        texts.append(' '.join(tokens[:words]))
+    return texts
+
+
+def synthetic_articles(count, words, seed=0):
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(count):
+        length = rng.randint(words // 2, words)
+        sentences = []
+        while sum(len(s.split()) for s in sentences) < length:
+            sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+            sentences.append(sentence.capitalize() + '.')
+        articles.append(' '.join(sentences))
+    return articles
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,293 @@
+"""Reproducible benchmark suite for the NLP pipeline and the web endpoints.
+
+`run` times the model functions on the local corpus at several lengths and batch
+sizes, then load-tests the Flask endpoints through the test client with page
+downloads stubbed out, and writes every measurement to a JSON file. `compare`
+checks a run against a saved baseline and exits with status 1 on a regression.
+
+Usage: python benchmarks/suite.py run [--out results.json] [--quick] [--only micro endpoints]
+       python benchmarks/suite.py compare baseline.json results.json [--threshold 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from html import escape
+from importlib import metadata
+
+import common
+
+LENGTHS = {'short': 120, 'medium': 340, 'long': 700, 'xlong': 1100}
+BATCH_SIZES = (1, 4, 8)
+QUICK_LENGTHS = ('short', 'medium')
+QUICK_BATCH_SIZES = (1, 4)
+MAX_COUNT = 100
+MIN_COUNT = 50
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better='lower'):
+        self.metrics[name] = {'value': round(value, 4), 'unit': unit, 'better': better}
+        print(f'{name:<52} {value:>10.2f} {unit}', flush=True)
+
+
+def timed_median(fn, repeat):
+    fn()  # warm-up: model load, first-call allocations
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_micro(results, lengths, batch_sizes, repeat):
+    from app.model_registry import warm_up
+    from app.senti_analysis import senti_analysis, senti_analysis_chunks
+    from app.summarization import generate_summaries
+    from app.tags import generate_tags_batch
+
+    for name, seconds in warm_up().items():
+        results.add(f'load.{name}', seconds, 's')
+    for length in lengths:
+        for batch_size in batch_sizes:
+            texts = common.corpus_texts(batch_size, LENGTHS[length])
+            seconds = timed_median(lambda: generate_summaries(texts, MAX_COUNT, MIN_COUNT), repeat)
+            results.add(f'summarize.{length}.batch{batch_size}', seconds / batch_size * 1000, 'ms/article')
+            seconds = timed_median(lambda: generate_tags_batch(texts), repeat)
+            results.add(f'tags.{length}.batch{batch_size}', seconds / batch_size * 1000, 'ms/article')
+        # The sentiment model classifies one text per call (the pipeline runs it on summaries).
+        texts = common.corpus_texts(4, LENGTHS[length])
+        seconds = timed_median(lambda: [senti_analysis(text) for text in texts], repeat)
+        results.add(f'sentiment.{length}', seconds / len(texts) * 1000, 'ms/article')
+        # Chunk mode scores the full texts, all chunks of the batch in one call.
+        seconds = timed_median(lambda: senti_analysis_chunks(texts), repeat)
+        results.add(f'sentiment_chunks.{length}', seconds / len(texts) * 1000, 'ms/article')
+
+
+def article_html(url, text):
+    title = f'Benchmark article {url.rsplit("/", 1)[-1]}'
+    paragraphs = ''.join(f'<p>{escape(text[i:i + 600])}</p>' for i in range(0, len(text), 600))
+    return (f'<html><head><title>{title}</title><meta name="author" content="Benchmark">'
+            f'<meta property="article:published_time" content="2024-01-01T00:00:00Z"></head>'
+            f'<body><article><h1>{title}</h1>{paragraphs}</article></body></html>')
+
+
+def stub_fetching(texts):
+    # Pages are served from memory so endpoint timings do not include the network.
+    from app import fetch
+
+    def fetch_html(url):
+        return article_html(url, texts[int(url.rsplit('/', 1)[-1]) % len(texts)])
+    fetch.fetch_html = fetch_html
+
+
+def load_test(client_factory, path, threads, requests_per_thread):
+    latencies = []
+    lock = threading.Lock()
+
+    def run(client):
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} returned {response.status_code}')
+            with lock:
+                latencies.append(elapsed)
+
+    # Clients log in before the clock starts.
+    workers = [threading.Thread(target=run, args=(client_factory(),)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, time.perf_counter() - start
+
+
+def run_endpoints(results, repeat, threads, requests_per_thread):
+    from flask_migrate import upgrade
+    from app import app, db, vector_index
+    from app.models import ArticleFingerprint, User, Folder
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    vector_index.VECTOR_DIR = os.path.join(os.environ['BENCH_TMP'], 'vectors')
+    # One text per corpus article; more would only repeat them.
+    texts = common.corpus_texts(len(common.load_corpus()), LENGTHS['medium'])
+    stub_fetching(texts)
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(common.BENCH_DIR), 'migrations'))
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def login():
+        client = app.test_client()
+        client.post('/', data={'username': 'bench', 'password': 'bench'})
+        return client
+
+    client = login()
+    job_times, save_times = [], []
+    for run in range(repeat + 1):
+        # Each run reuses the same texts, so the fingerprints saved by the previous
+        # run are dropped; otherwise every article after the first run is answered
+        # by the near-duplicate shortcut and the models never run.
+        with app.app_context():
+            ArticleFingerprint.query.filter_by(user_id=user_id).delete()
+            db.session.commit()
+        urls = {f'url{i + 1}': f'https://bench.example/{run * 5 + i}' for i in range(5)}
+        start = time.perf_counter()
+        client.post('/summarization', data=dict(urls, max_count=MAX_COUNT, min_count=MIN_COUNT, submit='submit'))
+        with client.session_transaction() as session:
+            job_id = session['job_id']
+        while True:
+            status = client.get(f'/job/{job_id}/status').get_json()
+            if status['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        if status['status'] != 'done' or status['errors']:
+            raise RuntimeError(f'summarization job failed: {status["errors"]}')
+        with app.app_context():
+            folder = Folder(name=f'bench {run}', user_id=user_id)
+            db.session.add(folder)
+            db.session.commit()
+            folder_id = folder.id
+        start = time.perf_counter()
+        client.post('/result', data={'articles': [str(i) for i in range(5)], 'folder': folder_id})
+        # The first run loads the models and is left out.
+        if run:
+            job_times.append(elapsed)
+            save_times.append(time.perf_counter() - start)
+    results.add('endpoint.summarize_job_5_urls', statistics.median(job_times) * 1000, 'ms')
+    results.add('endpoint.save_5_articles', statistics.median(save_times) * 1000, 'ms')
+
+    paths = {
+        'folder_listing': f'/api/folders/{folder_id}/articles',
+        'folder_page': f'/folder/{folder_id}',
+        'keyword_search': '/search?q=minister',
+        'metrics': '/metrics',
+    }
+    for name, path in paths.items():
+        latencies, elapsed = load_test(login, path, threads, requests_per_thread)
+        results.add(f'endpoint.{name}.p50', percentile(latencies, 0.5) * 1000, 'ms')
+        results.add(f'endpoint.{name}.p95', percentile(latencies, 0.95) * 1000, 'ms')
+        results.add(f'endpoint.{name}.throughput', len(latencies) / elapsed, 'req/s', better='higher')
+
+
+def environment():
+    versions = {}
+    for package in ('torch', 'transformers', 'keybert', 'sentence-transformers', 'numpy', 'flask', 'sqlalchemy'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=common.BENCH_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    from app import app
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'packages': versions,
+        'inference_backend': app.config['INFERENCE_BACKEND'],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run(args):
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BENCH_TMP'] = tmp.name
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp.name, 'bench.sqlite')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['JOB_WORKERS'] = '1'
+    os.environ['JOB_POLL_INTERVAL'] = '0.05'
+
+    results = Results()
+    lengths = QUICK_LENGTHS if args.quick else tuple(LENGTHS)
+    batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    repeat = 1 if args.quick else args.repeat
+    if 'micro' in args.only:
+        run_micro(results, lengths, batch_sizes, repeat)
+    if 'endpoints' in args.only:
+        run_endpoints(results, repeat, args.threads, 5 if args.quick else 25)
+
+    report = {'environment': environment(), 'quick': args.quick, 'metrics': results.metrics}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f'wrote {len(results.metrics)} metrics to {args.out}')
+    tmp.cleanup()
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        current = json.load(f)
+    if baseline['environment'].get('platform') != current['environment'].get('platform'):
+        print('warning: the baseline was recorded on a different platform', file=sys.stderr)
+
+    regressions = 0
+    print(f"{'metric':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, metric in sorted(current['metrics'].items()):
+        base = baseline['metrics'].get(name)
+        if base is None or not base['value']:
+            print(f"{name:<52} {'-':>10} {metric['value']:>10.2f}      new")
+            continue
+        change = metric['value'] / base['value'] - 1
+        worse = change > args.threshold if metric['better'] == 'lower' else change < -args.threshold
+        regressions += worse
+        print(f"{name:<52} {base['value']:>10.2f} {metric['value']:>10.2f} {change:>+7.1%}"
+              f"{'  REGRESSION' if worse else ''}")
+    missing = sorted(set(baseline['metrics']) - set(current['metrics']))
+    for name in missing:
+        print(f'{name:<52} missing from the current run')
+    print(f'{regressions} regression(s) beyond {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the suite and write a JSON report')
+    run_parser.add_argument('--out', default='benchmark-results.json')
+    run_parser.add_argument('--only', nargs='+', choices=('micro', 'endpoints'), default=('micro', 'endpoints'))
+    run_parser.add_argument('--quick', action='store_true', help='fewer lengths, batch sizes and repeats')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--threads', type=int, default=4, help='concurrent clients in the endpoint load tests')
+    compare_parser = commands.add_parser('compare', help='flag regressions against a saved baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help='relative slowdown treated as a regression (default 0.15)')
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Add normalized tags and the article_tags index
+
+Revision ID: d5b1e8a4c7f3
+Revises: a8c3f1e6d2b9
+Create Date: 2026-10-18 19:12:40.518337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b1e8a4c7f3'
+down_revision = 'a8c3f1e6d2b9'
+branch_labels = None
+depends_on = None
+
+# Same normalization as app.tag_index.parse_tags, copied so the migration does not
+# change when the app does.
+MAX_TAG_LENGTH = 64
+BATCH = 1000
+
+
+def parse_tags(text):
+    tags = []
+    for tag in (text or '').split(','):
+        tag = ' '.join(tag.split()).lower()[:MAX_TAG_LENGTH]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def backfill():
+    # Splits the existing comma-separated Article.tags in batches of BATCH articles,
+    # walking the primary key so memory stays flat on large tables.
+    bind = op.get_bind()
+    article = sa.table('article', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer),
+                       sa.column('tags', sa.String))
+    tags = sa.table('tags', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    article_tags = sa.table('article_tags', sa.column('article_id', sa.Integer), sa.column('tag_id', sa.Integer),
+                            sa.column('user_id', sa.Integer))
+    tag_ids = {}
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.select(article.c.id, article.c.user_id, article.c.tags)
+                            .where(article.c.id > last_id, article.c.tags.isnot(None))
+                            .order_by(article.c.id).limit(BATCH)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        parsed = [(row.id, row.user_id, parse_tags(row.tags)) for row in rows]
+        new_names = sorted({name for _, _, names in parsed for name in names} - set(tag_ids))
+        if new_names:
+            bind.execute(tags.insert(), [{'name': name} for name in new_names])
+            for start in range(0, len(new_names), 500):
+                tag_ids.update(bind.execute(sa.select(tags.c.name, tags.c.id)
+                                            .where(tags.c.name.in_(new_names[start:start + 500]))).all())
+        links = [{'article_id': article_id, 'tag_id': tag_ids[name], 'user_id': user_id}
+                 for article_id, user_id, names in parsed for name in names]
+        if links:
+            bind.execute(article_tags.insert(), links)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tags_name'), ['name'], unique=True)
+
+    op.create_table('article_tags',
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['article.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ),
+    sa.PrimaryKeyConstraint('article_id', 'tag_id')
+    )
+    # ### end Alembic commands ###
+    # The lookup index is built after the backfill, which is faster than maintaining
+    # it row by row during the bulk insert.
+    backfill()
+    with op.batch_alter_table('article_tags', schema=None) as batch_op:
+        batch_op.create_index('ix_article_tags_user_tag', ['user_id', 'tag_id', 'article_id'], unique=False)
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('article_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_article_tags_user_tag')
+
+    op.drop_table('article_tags')
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tags_name'))
+
+    op.drop_table('tags')
+    # ### end Alembic commands ###
@@ -0,0 +1,54 @@
+"""Add full-text search index on articles
+
+Revision ID: e2a9c4f7b851
+Revises: 4f8a1b6d93e5
+Create Date: 2026-10-18 14:05:32.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c4f7b851'
+down_revision = '4f8a1b6d93e5'
+branch_labels = None
+depends_on = None
+
+# article_fts is an external-content FTS5 table: it stores only the index and reads
+# title/summary/tags from the article table, kept in sync by the triggers below.
+# Note: a batch migration that recreates the article table drops these triggers.
+FTS_STATEMENTS = [
+    """CREATE VIRTUAL TABLE article_fts USING fts5(
+        title, summary, tags, content='article', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER article_fts_ai AFTER INSERT ON article BEGIN
+        INSERT INTO article_fts(rowid, title, summary, tags) VALUES (new.id, new.title, new.summary, new.tags);
+    END""",
+    """CREATE TRIGGER article_fts_ad AFTER DELETE ON article BEGIN
+        INSERT INTO article_fts(article_fts, rowid, title, summary, tags)
+        VALUES ('delete', old.id, old.title, old.summary, old.tags);
+    END""",
+    """CREATE TRIGGER article_fts_au AFTER UPDATE OF title, summary, tags ON article BEGIN
+        INSERT INTO article_fts(article_fts, rowid, title, summary, tags)
+        VALUES ('delete', old.id, old.title, old.summary, old.tags);
+        INSERT INTO article_fts(rowid, title, summary, tags) VALUES (new.id, new.title, new.summary, new.tags);
+    END""",
+    "INSERT INTO article_fts(article_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS article_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS article_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS article_fts_ai')
+    op.execute('DROP TABLE IF EXISTS article_fts')
@@ -0,0 +1,74 @@
+import os
+
+# The app reads its configuration when it is imported: an in-memory database, no
+# job worker threads and no on-disk result cache.
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['JOB_WORKERS'] = '0'
+os.environ['RESULT_CACHE_ENABLED'] = '0'
+
+from types import SimpleNamespace
+import pytest
+from app import app as flask_app, db, pipeline, vector_index
+from app.models import Folder, User
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    monkeypatch.setattr(vector_index, 'VECTOR_DIR', str(tmp_path / 'vectors'))
+    vector_index._indexes.clear()
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='reader', email='reader@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    client.post('/', data={'username': 'reader', 'password': 'secret'})
+    return client
+
+
+@pytest.fixture
+def models(monkeypatch):
+    # Runs the pipeline without network or models: pages come from models.pages, and
+    # the fetched URLs and the texts given to the models are recorded.
+    pages = {}
+    fetched = []
+    modelled = []
+
+    def iter_fetched(urls, max_in_flight=None):
+        fetched.extend(urls)
+        yield [(url, SimpleNamespace(title=url, authors=['Author'], date_publish=None, maintext=pages[url]), None)
+               for url in urls]
+
+    def run_models(contents, max_count, min_count):
+        modelled.extend(contents)
+        return [(f'Summary of {content[:10]}', {'label': 'Neutral', 'score': 0.5}, 'tag', None, None)
+                for content in contents]
+
+    monkeypatch.setattr(pipeline, 'iter_fetched', iter_fetched)
+    monkeypatch.setattr(pipeline, 'run_models', run_models)
+    return SimpleNamespace(pages=pages, fetched=fetched, modelled=modelled)
+
+
+@pytest.fixture
+def make_folder(user):
+    def make_folder(name='Folder'):
+        folder = Folder(name=name, user_id=user.id)
+        db.session.add(folder)
+        db.session.commit()
+        return folder
+    return make_folder
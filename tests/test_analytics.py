@@ -0,0 +1,82 @@
+from app import db
+from app.models import Article
+
+
+def add_articles(user, folder, rows):
+    for url, date, label, score in rows:
+        db.session.add(Article(url=url, title='t', author='a', date=date, summary='s', senti_label=label,
+                               senti_score=score, domain=url.split('/')[2], user_id=user.id, folder_id=folder.id))
+    db.session.commit()
+
+
+def test_domain_breakdown_by_month(app, user, client, make_folder):
+    add_articles(user, make_folder(), [
+        ('https://a.example/1', '2024-01-05 10:00:00', 'Positive', 0.9),
+        ('https://a.example/2', '2024-01-20 10:00:00', 'Negative', 0.7),
+        ('https://a.example/3', '2024-02-01 10:00:00', 'Positive', 0.8),
+        ('https://a.example/4', None, 'Neutral', 0.6),
+        ('https://b.example/1', '2024-02-03 10:00:00', 'Negative', 0.5),
+    ])
+    groups = client.get('/api/sentiment?group=domain&period=month').get_json()['groups']
+    assert [group['key'] for group in groups] == ['a.example', 'b.example']
+    first = groups[0]
+    assert first['count'] == 4
+    assert [(entry['key'], entry['count'], entry['labels']) for entry in first['timeline']] == [
+        ('2024-01', 2, {'Positive': 1, 'Negative': 1}), ('2024-02', 1, {'Positive': 1})]
+    assert first['timeline'][0]['mean'] == 0.8
+    assert groups[1]['timeline'] == [{'key': '2024-02', 'count': 1, 'mean': 0.5, 'labels': {'Negative': 1}}]
+
+
+def test_period_needs_a_folder_or_domain_group(app, client):
+    assert client.get('/api/sentiment?group=month&period=month').status_code == 400
+    assert client.get('/api/sentiment?group=domain&period=week').status_code == 400
+    assert client.get('/api/sentiment?group=domain').get_json()['groups'] == []
+
+
+def test_summary_and_histogram(app, user, client, make_folder):
+    folder = make_folder()
+    add_articles(user, folder, [
+        ('https://a.example/1', None, 'Positive', 0.95),
+        ('https://a.example/2', None, 'Positive', 0.55),
+        ('https://a.example/3', None, 'Negative', 0.45),
+        ('https://a.example/4', None, 'Neutral', 1.0),
+    ])
+    add_articles(user, make_folder('other'), [('https://a.example/5', None, 'Negative', 0.9)])
+    stats = client.get(f'/api/sentiment?folder={folder.id}').get_json()
+    assert stats['summary']['total'] == 4
+    assert [(row['label'], row['count'], row['share'], row['mean'], row['min'], row['max'])
+            for row in stats['summary']['labels']] == [
+        ('Positive', 2, 0.5, 0.75, 0.55, 0.95), ('Neutral', 1, 0.25, 1.0, 1.0, 1.0),
+        ('Negative', 1, 0.25, 0.45, 0.45, 0.45)]
+    counts = stats['distribution']['counts']
+    assert counts['Positive'] == [0, 0, 1, 0, 0, 0, 1]
+    assert counts['Negative'] == [0, 1, 0, 0, 0, 0, 0]
+    # A score of exactly 1.0 lands in the last bin.
+    assert counts['Neutral'] == [0, 0, 0, 0, 0, 0, 1]
+
+
+def test_folder_groups_and_timeline(app, user, client, make_folder):
+    small, large = make_folder('small'), make_folder('large')
+    add_articles(user, small, [('https://a.example/1', '2024-03-01 00:00:00', 'Positive', 0.8)])
+    add_articles(user, large, [
+        ('https://b.example/1', '2024-01-01 00:00:00', 'Negative', 0.6),
+        ('https://b.example/2', '2024-03-09 00:00:00', 'Negative', 0.8),
+    ])
+    groups = client.get('/api/sentiment?group=folder').get_json()['groups']
+    assert [(group['name'], group['count'], group['mean']) for group in groups] == [('large', 2, 0.7),
+                                                                                   ('small', 1, 0.8)]
+    timeline = client.get('/api/sentiment?group=month').get_json()['groups']
+    assert [(entry['key'], entry['labels']) for entry in timeline] == [
+        ('2024-01', {'Negative': 1}), ('2024-03', {'Negative': 1, 'Positive': 1})]
+
+
+def test_compare_ranks_articles_in_sql(app, user, client, make_folder):
+    add_articles(user, make_folder(), [
+        ('https://a.example/low', None, 'Positive', 0.6),
+        ('https://a.example/high', None, 'Positive', 0.9),
+        ('https://a.example/bad', None, 'Negative', 0.7),
+    ])
+    ids = [str(article.id) for article in Article.query.all()]
+    page = client.post('/compare_articles', data={'article_ids': ids}).get_data(as_text=True)
+    assert page.index('a.example/high') < page.index('a.example/low')
+    assert 'a.example/bad' in page
@@ -0,0 +1,153 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from app import app, fetch
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    # /page/<name> returns a page, /slow/<seconds>/<name> returns it after a delay
+    # and /status/<code> fails with that status. The server counts the requests in
+    # progress and the most it saw at once.
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.started += 1
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            parts = self.path.strip('/').split('/')
+            if parts[0] == 'status':
+                return self.send_page(int(parts[1]), 'error')
+            if parts[0] == 'slow':
+                time.sleep(float(parts[1]))
+            self.send_page(200, f'<html><body>{parts[-1]}</body></html>')
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def send_page(self, status, body):
+        body = body.encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            # The client gave up waiting (timeout tests).
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.started = server.active = server.peak = 0
+    server.base = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetching(monkeypatch):
+    # A fresh session and host semaphores for the settings of each test, no retries,
+    # and the raw HTML as the "article" so news-please is not needed.
+    monkeypatch.setitem(app.config, 'FETCH_RETRIES', 0)
+    monkeypatch.setitem(app.config, 'FETCH_TIMEOUT', 5)
+    monkeypatch.setitem(app.config, 'FETCH_PER_HOST', 2)
+    monkeypatch.setitem(app.config, 'FETCH_MAX_WORKERS', 8)
+    monkeypatch.setattr(fetch, '_session', None)
+    fetch._host_semaphores.clear()
+    monkeypatch.setattr(fetch, 'fetch_article', fetch.fetch_html)
+    yield app.config
+    fetch._host_semaphores.clear()
+
+
+def fetched(urls, **kwargs):
+    return [row for batch in fetch.iter_fetched(urls, **kwargs) for row in batch]
+
+
+def test_iter_fetched_returns_every_page(server, fetching):
+    urls = [f'{server.base}/page/{i}' for i in range(6)]
+    rows = fetched(urls)
+    assert sorted(url for url, _, _ in rows) == sorted(urls)
+    for url, html, error in rows:
+        assert error is None
+        assert html == f'<html><body>{url.rsplit("/", 1)[-1]}</body></html>'
+
+
+def test_iter_fetched_yields_pages_as_they_finish(server, fetching):
+    fetching['FETCH_PER_HOST'] = 4
+    urls = [f'{server.base}/slow/0.5/slow'] + [f'{server.base}/page/{i}' for i in range(3)]
+    start = time.perf_counter()
+    batches = fetch.iter_fetched(urls)
+    first = next(batches)
+    assert time.perf_counter() - start < 0.4
+    assert urls[0] not in [url for url, _, _ in first]
+    rest = [row for batch in batches for row in batch]
+    assert [url for url, _, _ in first + rest][-1] == urls[0]
+
+
+def test_fetch_per_host_caps_concurrent_requests(server, fetching):
+    urls = [f'{server.base}/slow/0.2/{i}' for i in range(6)]
+    rows = fetched(urls)
+    assert all(error is None for _, _, error in rows)
+    assert server.peak == 2
+    # Semaphores of hosts with nothing in flight are dropped.
+    assert fetch._host_semaphores == {}
+
+
+def test_max_in_flight_caps_concurrent_requests(server, fetching):
+    fetching['FETCH_PER_HOST'] = 8
+    urls = [f'{server.base}/slow/0.2/{i}' for i in range(9)]
+    rows = fetched(urls, max_in_flight=3)
+    assert len(rows) == 9
+    assert server.peak == 3
+
+
+def test_max_in_flight_waits_for_the_consumer(server, fetching):
+    fetching['FETCH_PER_HOST'] = 8
+    urls = [f'{server.base}/page/{i}' for i in range(6)]
+    batches = fetch.iter_fetched(urls, max_in_flight=2)
+    first = next(batches)
+    # No new download starts until the consumer asks for the next batch.
+    time.sleep(0.3)
+    assert server.started == 2
+    rest = [row for batch in batches for row in batch]
+    assert len(first) + len(rest) == 6
+    assert server.started == 6
+
+
+def test_timeout_is_reported_per_url(server, fetching):
+    fetching['FETCH_TIMEOUT'] = 0.2
+    slow, fast = f'{server.base}/slow/1/late', f'{server.base}/page/on-time'
+    rows = {url: (html, error) for url, html, error in fetched([slow, fast])}
+    assert rows[fast] == ('<html><body>on-time</body></html>', None)
+    html, error = rows[slow]
+    assert html is None
+    # Behind the retrying adapter a read timeout surfaces as a ConnectionError.
+    assert isinstance(error, requests.RequestException)
+    assert 'timed out' in str(error)
+
+
+def test_http_and_connection_errors_are_reported(server, fetching):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+    missing, refused, ok = f'{server.base}/status/404', f'http://127.0.0.1:{closed_port}/page', f'{server.base}/page/ok'
+    rows = {url: (html, error) for url, html, error in fetched([missing, refused, ok])}
+    assert isinstance(rows[missing][1], requests.HTTPError)
+    assert rows[missing][1].response.status_code == 404
+    assert isinstance(rows[refused][1], requests.ConnectionError)
+    assert rows[ok] == ('<html><body>ok</body></html>', None)
+    assert rows[missing][0] is None and rows[refused][0] is None
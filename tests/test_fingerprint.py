@@ -0,0 +1,52 @@
+from app import db, fingerprint, ingest, pipeline
+
+TEXT = ' '.join(f'word{i}' for i in range(200))
+# A copy with one word changed: a couple of SimHash bits apart.
+EDITED = TEXT.replace('word100', 'changed')
+
+
+def save(user, folder, url, text):
+    result = {'url': url, 'title': 'Saved', 'author': 'Author', 'date': None, 'summary': 'Saved summary',
+              'senti_score': 0.9, 'senti_label': 'Positive', 'tags': 'saved', 'embedding': None,
+              'summary_embedding': None, 'simhash': fingerprint.simhash(text)}
+    ingest.save_articles(user.id, folder.id, [result])
+    db.session.commit()
+
+
+def test_near_duplicates_within_a_job_run_the_models_once(app, models):
+    models.pages.update({'https://a.example/1': TEXT, 'https://b.example/1': EDITED})
+    results, errors = pipeline.run_pipeline(list(models.pages), 100, 30)
+    assert errors == []
+    assert models.modelled == [TEXT]
+    assert results[1]['url'] == 'https://b.example/1'
+    assert results[1]['duplicate_of'] == 'https://a.example/1'
+    assert results[1]['summary'] == results[0]['summary']
+    assert results[1]['simhash'] != results[0]['simhash']
+
+
+def test_near_duplicate_of_a_saved_article_reuses_its_outputs(app, user, make_folder, models):
+    save(user, make_folder(), 'https://a.example/1', TEXT)
+    models.pages['https://b.example/1'] = EDITED
+    results, _ = pipeline.run_pipeline(['https://b.example/1'], 100, 30, user_id=user.id)
+    assert models.modelled == []
+    assert results[0]['duplicate_of'] == 'https://a.example/1'
+    assert (results[0]['summary'], results[0]['senti_label']) == ('Saved summary', 'Positive')
+
+
+def test_the_saved_copy_of_the_same_url_is_not_reused(app, user, make_folder, models):
+    save(user, make_folder(), 'https://a.example/1', TEXT)
+    models.pages['https://a.example/1'] = TEXT
+    results, _ = pipeline.run_pipeline(['https://a.example/1'], 100, 30, user_id=user.id)
+    assert models.modelled == [TEXT]
+    assert 'duplicate_of' not in results[0]
+
+
+def test_find_saved_duplicate_picks_the_closest_article(app, user, make_folder):
+    folder = make_folder()
+    save(user, folder, 'https://a.example/1', EDITED)
+    save(user, folder, 'https://a.example/2', TEXT)
+    value = fingerprint.simhash(TEXT)
+    assert fingerprint.find_saved_duplicate(user.id, value).url == 'https://a.example/2'
+    assert fingerprint.find_saved_duplicate(user.id, value, exclude_url='https://a.example/2').url == \
+        'https://a.example/1'
+    assert fingerprint.find_saved_duplicate(user.id + 1, value) is None
@@ -0,0 +1,46 @@
+import json
+from app import db
+from app.models import Job
+
+
+def add_job(user, results, status='done', payload=None):
+    job = Job(status=status, payload=payload or {'urls': [result['url'] for result in results]},
+              results=results, errors=[], user_id=user.id)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def read_events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_results_with_ids(app, user, client):
+    job = add_job(user, [{'url': f'https://news.example/{i}', 'summary': 'text', 'simhash': 1} for i in range(3)])
+    events = read_events(client.get(f'/job/{job.id}/stream'))
+    assert [(event_id, name) for event_id, name, _ in events] == \
+        [('0', 'result'), ('1', 'result'), ('2', 'result'), (None, 'done')]
+    assert 'simhash' not in events[0][2]
+    assert events[-1][2] == {'status': 'done', 'errors': []}
+
+
+def test_stream_resumes_after_last_event_id(app, user, client):
+    job = add_job(user, [{'url': f'https://news.example/{i}'} for i in range(4)])
+    events = read_events(client.get(f'/job/{job.id}/stream', headers={'Last-Event-ID': '1'}))
+    assert [data.get('url') for _, name, data in events if name == 'result'] == \
+        ['https://news.example/2', 'https://news.example/3']
+
+
+def test_stream_sends_progress_for_ingest_jobs(app, user, client, make_folder):
+    folder = make_folder()
+    progress = {'total': 3, 'skipped': 1, 'processed': 2, 'saved': 2, 'failed': 0}
+    job = Job(status='done', payload={'urls': ['a', 'b', 'c'], 'folder_id': folder.id}, results=progress,
+              errors=[], user_id=user.id)
+    db.session.add(job)
+    db.session.commit()
+    events = read_events(client.get(f'/job/{job.id}/stream'))
+    assert events == [(None, 'progress', progress), (None, 'done', {'status': 'done', 'errors': []})]
@@ -0,0 +1,56 @@
+import threading
+from datetime import datetime, timedelta
+from app import app as flask_app, db, jobs
+from app.models import Job
+
+
+def add_job(user, status, **times):
+    job = Job(user_id=user.id, status=status, payload={'urls': []}, **times)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_recover_jobs_requeues_jobs_without_a_recent_heartbeat(app, user):
+    now = datetime.now()
+    stale = timedelta(seconds=flask_app.config['JOB_TIMEOUT'] + 1)
+    abandoned = add_job(user, jobs.RUNNING, started_at=now - stale, heartbeat_at=now - stale)
+    long_running = add_job(user, jobs.RUNNING, started_at=now - 10 * stale, heartbeat_at=now)
+    never_beat = add_job(user, jobs.RUNNING, started_at=now - stale)
+    jobs.recover_jobs()
+    db.session.expire_all()
+    assert db.session.get(Job, abandoned).status == jobs.PENDING
+    assert db.session.get(Job, long_running).status == jobs.RUNNING
+    assert db.session.get(Job, never_beat).status == jobs.PENDING
+
+
+def test_due_fires_once_per_interval(monkeypatch):
+    monkeypatch.setattr(jobs, '_next_run', {})
+    assert jobs.due('task', 60)
+    assert not jobs.due('task', 60)
+    assert jobs.due('other', 60)
+
+
+def test_purge_jobs_removes_finished_jobs_past_the_ttl(app, user):
+    now = datetime.now()
+    expired = now - timedelta(seconds=flask_app.config['RESULT_STORE_TTL'] + 1)
+    old_done = add_job(user, jobs.DONE, finished_at=expired)
+    old_failed = add_job(user, jobs.FAILED, finished_at=expired)
+    recent = add_job(user, jobs.DONE, finished_at=now)
+    pending = add_job(user, jobs.PENDING)
+    assert jobs.purge_jobs() == 2
+    db.session.expire_all()
+    assert db.session.get(Job, old_done) is None and db.session.get(Job, old_failed) is None
+    assert db.session.get(Job, recent) is not None and db.session.get(Job, pending) is not None
+
+
+def test_worker_loop_purges_expired_jobs(app, user, monkeypatch):
+    monkeypatch.setattr(jobs, '_next_run', {})
+    expired = add_job(user, jobs.DONE,
+                      finished_at=datetime.now() - timedelta(seconds=flask_app.config['RESULT_STORE_TTL'] + 1))
+    monkeypatch.setitem(flask_app.config, 'JOB_POLL_INTERVAL', 0)
+    stop = threading.Event()
+    monkeypatch.setattr(jobs, 'claim_next_job', lambda: stop.set())
+    jobs.work(stop)
+    db.session.expire_all()
+    assert db.session.get(Job, expired) is None
@@ -0,0 +1,19 @@
+REMOTE = {'REMOTE_ADDR': '203.0.113.7'}
+
+
+def test_metrics_answer_local_requests_without_a_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    client = app.test_client()
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'job_queue_depth' in response.get_data(as_text=True)
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+
+
+def test_metrics_require_the_token_when_one_is_set(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 's3cret')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}, environ_base=REMOTE)
+    assert response.status_code == 200
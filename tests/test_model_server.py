@@ -0,0 +1,94 @@
+import socket
+import threading
+import time
+import pytest
+from app import app, model_server
+
+
+class IdleClosingHandler(model_server.Handler):
+    # Closes keep-alive connections idle for more than 0.1 seconds.
+    timeout = 0.1
+
+
+@pytest.fixture
+def server(monkeypatch):
+    calls = []
+
+    def echo(items):
+        calls.append(list(items))
+        return items
+
+    monkeypatch.setattr(IdleClosingHandler, 'batchers', {'echo': model_server.Batcher('echo', echo, 16, 0)})
+    server = model_server.ThreadingTCPHTTPServer(('127.0.0.1', 0), IdleClosingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setitem(app.config, 'MODEL_SERVER_URL', f'http://127.0.0.1:{server.server_address[1]}')
+    monkeypatch.setitem(app.config, 'MODEL_SERVER_TIMEOUT', 5)
+    model_server._local.conn = None
+    server.calls = calls
+    yield server
+    model_server._local.conn = None
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def silent_server(monkeypatch):
+    # Accepts connections and reads requests but never answers.
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    monkeypatch.setitem(app.config, 'MODEL_SERVER_URL', f'http://127.0.0.1:{listener.getsockname()[1]}')
+    monkeypatch.setitem(app.config, 'MODEL_SERVER_TIMEOUT', 0.2)
+    model_server._local.conn = None
+    yield accepted
+    model_server._local.conn = None
+    listener.close()
+    for conn in accepted:
+        conn.close()
+
+
+def test_call_returns_results(server):
+    assert model_server.call('echo', ['a', 'b']) == ['a', 'b']
+    assert server.calls == [['a', 'b']]
+
+
+def test_unknown_operation_is_an_error(server):
+    with pytest.raises(model_server.ModelServerError, match='Unknown operation'):
+        model_server.call('missing', ['a'])
+    # The connection is still usable afterwards.
+    assert model_server.call('echo', ['b']) == ['b']
+
+
+def test_idle_connection_closed_by_server_is_retried(server):
+    assert model_server.call('echo', ['first']) == ['first']
+    time.sleep(0.3)
+    assert model_server.call('echo', ['second']) == ['second']
+    assert server.calls == [['first'], ['second']]
+
+
+def test_timeout_is_not_retried(silent_server):
+    with pytest.raises(model_server.ModelServerError, match='timed out'):
+        model_server.call('echo', ['a'])
+    time.sleep(0.1)
+    assert len(silent_server) == 1
+
+
+def test_refused_connection_is_not_retried(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setitem(app.config, 'MODEL_SERVER_URL', f'http://127.0.0.1:{port}')
+    model_server._local.conn = None
+    with pytest.raises(model_server.ModelServerError, match='unavailable'):
+        model_server.call('echo', ['a'])
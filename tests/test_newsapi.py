@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from app import db, newsapi
+from app.models import RateLimit
+
+
+class NewsHandler(BaseHTTPRequestHandler):
+    # Answers every request with server.articles (or server.status, if not 200) and
+    # records the query and API key of each request.
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((parse_qs(urlparse(self.path).query), self.headers.get('X-Api-Key')))
+            status, articles = server.status, list(server.articles)
+        body = json.dumps({'status': 'ok', 'articles': articles}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(app, monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), NewsHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.status = 200
+    server.articles = [{'title': 'First', 'publishedAt': '2024-01-01T00:00:00Z'}]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setitem(app.config, 'NEWSAPI_URL', f'http://127.0.0.1:{server.server_address[1]}/v2/everything')
+    monkeypatch.setitem(app.config, 'NEWSAPI_KEY', 'secret-key')
+    monkeypatch.setitem(app.config, 'NEWSAPI_CACHE_TTL', 900)
+    monkeypatch.setitem(app.config, 'NEWSAPI_STALE_TTL', 3600)
+    monkeypatch.setitem(app.config, 'NEWSAPI_REQUESTS_PER_DAY', 100)
+    monkeypatch.setitem(app.config, 'NEWSAPI_BURST', 10)
+    monkeypatch.setattr(newsapi, '_session', None)
+    monkeypatch.setattr(newsapi, '_bucket', None)
+    newsapi.clear_cache()
+    yield server
+    newsapi.clear_cache()
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_search_sends_the_key_and_caches_results(server):
+    assert newsapi.search('Climate', ['bbc-news', 'abc-news'])[0]['title'] == 'First'
+    # Same search with different case and source order: served from the cache.
+    assert newsapi.search(' climate', ['abc-news', 'bbc-news'])[0]['title'] == 'First'
+    assert len(server.requests) == 1
+    params, api_key = server.requests[0]
+    assert api_key == 'secret-key'
+    assert params == {'q': ['Climate'], 'sources': ['bbc-news,abc-news']}
+
+
+def test_stale_results_are_served_while_they_refresh(app, server):
+    newsapi.search('climate', ['bbc-news'])
+    app.config['NEWSAPI_CACHE_TTL'] = 0
+    server.articles = [{'title': 'Second', 'publishedAt': '2024-01-02T00:00:00Z'}]
+    assert newsapi.search('climate', ['bbc-news'])[0]['title'] == 'First'
+    wait_for(lambda: not newsapi._refreshing and len(server.requests) == 2)
+    app.config['NEWSAPI_CACHE_TTL'] = 900
+    assert newsapi.search('climate', ['bbc-news'])[0]['title'] == 'Second'
+    assert len(server.requests) == 2
+
+
+def test_expired_results_are_fetched_again(app, server):
+    newsapi.search('climate', ['bbc-news'])
+    app.config.update(NEWSAPI_CACHE_TTL=0, NEWSAPI_STALE_TTL=0)
+    server.articles = []
+    assert newsapi.search('climate', ['bbc-news']) == []
+    assert len(server.requests) == 2
+
+
+def test_requests_beyond_the_burst_are_refused(app, server):
+    app.config['NEWSAPI_BURST'] = 2
+    newsapi.search('one', [])
+    newsapi.search('two', [])
+    with pytest.raises(newsapi.NewsAPIError, match='limit reached'):
+        newsapi.search('three', [])
+    assert len(server.requests) == 2
+    # Cached searches spend no tokens.
+    assert newsapi.search('one', [])[0]['title'] == 'First'
+
+
+def test_the_quota_is_shared_between_processes(app, server):
+    app.config['NEWSAPI_BURST'] = 3
+    newsapi.search('one', [])
+    # Another process has its own bucket object and cache but draws on the same row.
+    other = newsapi.TokenBucket('newsapi', 100 / 86400, 3)
+    assert other.try_acquire() and other.try_acquire()
+    assert not other.try_acquire()
+    with pytest.raises(newsapi.NewsAPIError, match='limit reached'):
+        newsapi.search('two', [])
+    assert db.session.get(RateLimit, 'newsapi').tokens < 1
+
+
+def test_upstream_rate_limit_drains_the_bucket(app, server):
+    server.status = 429
+    with pytest.raises(newsapi.NewsAPIError, match='limit reached'):
+        newsapi.search('one', [])
+    server.status = 200
+    with pytest.raises(newsapi.NewsAPIError, match='limit reached'):
+        newsapi.search('two', [])
+    assert len(server.requests) == 1
@@ -0,0 +1,67 @@
+from app import db
+from app.models import Article, Folder, User
+
+
+def add_articles(user, folder, count):
+    db.session.add_all([Article(url=f'https://news.example/{folder.id}/{i}', title=f'Title {i}', summary='s',
+                                senti_score=0.5, senti_label='Neutral', user_id=user.id, folder_id=folder.id)
+                        for i in range(count)])
+    db.session.commit()
+
+
+def walk(client, url):
+    # Follows the `next` cursors and returns every page.
+    pages = []
+    after = None
+    while True:
+        data = client.get(url + (f'&after={after}' if after else '')).get_json()
+        pages.append(data)
+        after = data['next']
+        if after is None:
+            return pages
+
+
+def test_article_pages_follow_the_cursor_to_the_end(app, user, client, make_folder):
+    folder = make_folder()
+    add_articles(user, folder, 12)
+    pages = walk(client, f'/api/folders/{folder.id}/articles?limit=5')
+    assert [len(page['articles']) for page in pages] == [5, 5, 2]
+    ids = [article['id'] for page in pages for article in page['articles']]
+    assert ids == sorted(ids) and len(set(ids)) == 12
+    assert pages[0]['next'] == ids[4]
+
+
+def test_page_size_is_capped(app, user, client, make_folder, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_SIZE_MAX', 3)
+    folder = make_folder()
+    add_articles(user, folder, 4)
+    data = client.get(f'/api/folders/{folder.id}/articles?limit=1000').get_json()
+    assert len(data['articles']) == 3 and data['next'] is not None
+
+
+def test_folder_pages_list_only_the_users_folders(app, user, client, make_folder):
+    for i in range(3):
+        make_folder(f'Folder {i}')
+    other = User(username='other', email='other@example.com')
+    other.set_password('secret')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(Folder(name='Not mine', user_id=other.id))
+    db.session.commit()
+    pages = walk(client, '/api/folders?limit=2')
+    assert [folder['name'] for page in pages for folder in page['folders']] == ['Folder 0', 'Folder 1', 'Folder 2']
+    not_mine = Folder.query.filter_by(name='Not mine').one()
+    assert client.get(f'/api/folders/{not_mine.id}/articles').status_code == 404
+
+
+def test_folder_page_offers_more_only_when_there_is_more(app, user, client, make_folder, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_SIZE', 5)
+    folder = make_folder()
+    add_articles(user, folder, 5)
+    assert 'id="load_more"' not in client.get(f'/folder/{folder.id}').get_data(as_text=True)
+    db.session.add(Article(url='https://news.example/extra', title='Extra', summary='s', senti_score=0.5,
+                           senti_label='Neutral', user_id=user.id, folder_id=folder.id))
+    db.session.commit()
+    page = client.get(f'/folder/{folder.id}').get_data(as_text=True)
+    assert 'id="load_more"' in page
+    assert 'Extra' not in page
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db, ingest, result_store, stored_text, vector_index
+from app.models import Article, ArticleFingerprint, ArticleTag, Job
+
+SIZES = (1, 20)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def text_of(i):
+    return f'Article {i} text ' + ' '.join(f'word{i * 7 + j}' for j in range(40))
+
+
+def make_results(count, prefix='a'):
+    return [{
+        'url': f'https://news.example/{prefix}/{i}',
+        'title': f'Title {i}',
+        'author': 'Author',
+        'date': '2024-01-01 00:00:00',
+        'summary': f'Summary {i}',
+        'senti_score': 0.8,
+        'senti_label': 'Positive',
+        'tags': f'tag {i}, shared',
+        'embedding': None,
+        'summary_embedding': None,
+        'simhash': 1000 + i,
+        'content_hash': stored_text.content_hash(text_of(i)),
+    } for i in range(count)]
+
+
+def make_texts(count):
+    return {stored_text.content_hash(text_of(i)): stored_text.encode(text_of(i)) for i in range(count)}
+
+
+def saved_folder(user, make_folder, count, name):
+    folder = make_folder(name)
+    ingest.save_articles(user.id, folder.id, make_results(count, name), make_texts(count))
+    db.session.commit()
+    # The user's vector index is built from the database on first use; build it
+    # now so that one-off query is not counted.
+    vector_index.get_index(user.id)
+    return folder
+
+
+def start_job(client, user, results, texts):
+    job = Job(status='done', payload={'urls': [r['url'] for r in results]}, results=results, texts=texts,
+              user_id=user.id)
+    db.session.add(job)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['job_id'] = job.id
+
+
+def test_save_articles_query_count_is_constant(app, user, make_folder):
+    counts = []
+    for count in SIZES:
+        folder = make_folder(f'save {count}')
+        with count_queries() as statements:
+            new_ids = ingest.save_articles(user.id, folder.id, make_results(count, folder.name), make_texts(count))
+            db.session.commit()
+        assert len(new_ids) == count
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+    article = Article.query.filter_by(url='https://news.example/save 20/3').one()
+    assert stored_text.decompress(article.content) == text_of(3)
+    assert ArticleFingerprint.query.filter_by(article_id=article.id).count() == 4
+    assert ArticleTag.query.filter_by(article_id=article.id).count() == 2
+
+
+def test_save_articles_rejects_duplicate_urls(app, user, make_folder):
+    folder = make_folder()
+    results = make_results(2)
+    with pytest.raises(ValueError, match='news.example/a/0'):
+        ingest.save_articles(user.id, folder.id, results + results[:1])
+
+
+def test_result_save_query_count_is_constant(app, user, client, make_folder):
+    counts = []
+    for count in SIZES:
+        folder = make_folder(f'result {count}')
+        start_job(client, user, make_results(count, folder.name), make_texts(count))
+        with count_queries() as statements:
+            response = client.post('/result', data={'articles': [str(i) for i in range(count)], 'folder': folder.id})
+        assert response.status_code == 302
+        assert Article.query.filter_by(folder_id=folder.id).count() == count
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_result_save_reports_duplicate_selection(app, user, client, make_folder):
+    folder = make_folder()
+    results = make_results(2)
+    start_job(client, user, results + results[:1], make_texts(2))
+    client.post('/result', data={'articles': ['0', '1', '2'], 'folder': folder.id})
+    assert Article.query.filter_by(folder_id=folder.id).count() == 2
+    with client.session_transaction() as session:
+        messages = [message for _, message in session['_flashes']]
+    assert any('selected more than once' in message and 'news.example/a/0' in message for message in messages)
+
+
+def test_confirm_replace_query_count_is_constant(app, user, client, make_folder):
+    counts = []
+    for count in SIZES:
+        folder = saved_folder(user, make_folder, count, f'replace {count}')
+        old_ids = [article_id for article_id, in db.session.query(Article.id)
+                   .filter(Article.folder_id == folder.id).order_by(Article.id)]
+        new = [dict(result, folder_id=folder.id, summary='Replaced') for result in make_results(count, folder.name)]
+        token = result_store.put(user.id, [{'new': article, 'old_id': old_id, 'content': None}
+                                           for article, old_id in zip(new, old_ids)])
+        with client.session_transaction() as session:
+            session['replace_token'] = token
+        with count_queries() as statements:
+            page = client.get('/confirm_replace')
+            confirmed = client.post('/confirm_replace', data={'confirm_0': ''})
+        assert page.status_code == 200
+        assert confirmed.status_code == 302
+        assert db.session.get(Article, old_ids[0]).summary == 'Replaced'
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_delete_articles_query_count_is_constant(app, user, client, make_folder):
+    counts = []
+    for count in SIZES:
+        folder = saved_folder(user, make_folder, count, f'delete {count}')
+        ids = [str(article_id) for article_id, in db.session.query(Article.id).filter(Article.folder_id == folder.id)]
+        with count_queries() as statements:
+            response = client.post('/delete_articles', data={'article_ids': ids})
+        assert response.status_code == 302
+        assert Article.query.filter_by(folder_id=folder.id).count() == 0
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_delete_folder_query_count_is_constant(app, user, client, make_folder):
+    counts = []
+    for count in SIZES:
+        folder = saved_folder(user, make_folder, count, f'folder {count}')
+        with count_queries() as statements:
+            response = client.post(f'/delete_folder/{folder.id}')
+        assert response.status_code == 302
+        assert ArticleFingerprint.query.filter_by(user_id=user.id).count() == 0
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
@@ -0,0 +1,92 @@
+from itertools import count
+from types import SimpleNamespace
+import pytest
+from app import pipeline, result_cache, stored_text
+
+
+@pytest.fixture
+def cache(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'RESULT_CACHE_ENABLED', True)
+    monkeypatch.setitem(app.config, 'RESULT_CACHE_PATH', str(tmp_path / 'cache.sqlite'))
+    monkeypatch.setattr(result_cache, '_local', type(result_cache._local)())
+    yield app.config
+    result_cache.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Every call to time.time() in result_cache is one second later than the last.
+    ticks = count(1000)
+    monkeypatch.setattr(result_cache, 'time', SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def keys(namespace):
+    return [key for key, in result_cache.get_connection().execute(
+        'SELECT key FROM cache WHERE namespace = ? ORDER BY key', (namespace,))]
+
+
+def test_eviction_drops_the_least_recently_used_entries(cache, clock):
+    for i in range(20):
+        result_cache.put('summary', f'key{i:02}', 'x' * 100)
+    # Reading the oldest entries makes them the most recently used.
+    for i in range(5):
+        assert result_cache.get('summary', f'key{i:02}') == 'x' * 100
+    cache['RESULT_CACHE_MAX_BYTES'] = 20 * 102
+    assert result_cache.evict() == 0
+    # Over the limit: a tenth of the entries go, least recently used first.
+    cache['RESULT_CACHE_MAX_BYTES'] = 1000
+    assert result_cache.evict() == 2
+    assert keys('summary') == [f'key{i:02}' for i in list(range(5)) + list(range(7, 20))]
+
+
+def test_eviction_runs_as_entries_are_added(cache, monkeypatch):
+    cache['RESULT_CACHE_MAX_BYTES'] = 0
+    monkeypatch.setattr(result_cache, '_puts', 0)
+    for i in range(result_cache.EVICT_CHECK_EVERY):
+        result_cache.put('summary', f'key{i:02}', 'value')
+    assert len(keys('summary')) == result_cache.EVICT_CHECK_EVERY - 5
+
+
+def test_expired_entries_are_misses(cache, clock):
+    result_cache.put('article', 'short', 'value', ttl=1)
+    result_cache.put('article', 'long', 'value', ttl=100)
+    assert result_cache.get('article', 'short') is None
+    assert result_cache.get('article', 'long') == 'value'
+
+
+def test_cached_batch_computes_only_the_misses(cache):
+    calls = []
+
+    def compute(contents, suffix):
+        calls.append(list(contents))
+        return [content + suffix for content in contents]
+
+    assert result_cache.cached_batch('summary', 'model', compute, ['a', 'b'], '!') == ['a!', 'b!']
+    assert result_cache.cached_batch('summary', 'model', compute, ['b', 'c', 'a'], '!') == ['b!', 'c!', 'a!']
+    # Another model or other parameters are separate entries.
+    result_cache.cached_batch('summary', 'other', compute, ['a'], '!')
+    result_cache.cached_batch('summary', 'model', compute, ['a'], '?')
+    assert calls == [['a', 'b'], ['c'], ['a'], ['a']]
+
+
+def test_url_cache_hits_keep_their_text(cache, models):
+    url = 'https://news.example/1'
+    models.pages[url] = 'Markets rallied on Monday. ' * 20
+    first_texts, second_texts = {}, {}
+    first, _ = pipeline.run_pipeline([url], 100, 30, texts=first_texts)
+    second, _ = pipeline.run_pipeline([url], 100, 30, texts=second_texts)
+    assert models.fetched == [url]
+    assert second == first
+    assert second_texts == first_texts
+    assert stored_text.decompress(stored_text.decode(second_texts[second[0]['content_hash']])) == models.pages[url]
+
+
+def test_url_cache_hit_without_its_text_fetches_the_page(cache, models):
+    url = 'https://news.example/1'
+    models.pages[url] = 'Markets rallied on Monday. ' * 20
+    first, _ = pipeline.run_pipeline([url], 100, 30)
+    result_cache.get_connection().execute('DELETE FROM cache WHERE namespace = ?', ('text',))
+    texts = {}
+    pipeline.run_pipeline([url], 100, 30, texts=texts)
+    assert models.fetched == [url, url]
+    assert list(texts) == [first[0]['content_hash']]
@@ -0,0 +1,40 @@
+import pytest
+from app import senti_analysis
+from app.summarization import spread_evenly
+
+
+@pytest.fixture
+def model(app, monkeypatch):
+    # A stand-in for the sentiment pipeline that records how it was called.
+    calls = []
+
+    def pipeline(texts, **kwargs):
+        calls.append((list(texts), kwargs))
+        return [{'label': 'LABEL_2' if 'good' in text else 'LABEL_0', 'score': 0.9} for text in texts]
+
+    monkeypatch.setattr(senti_analysis, 'get_model', lambda name: pipeline)
+    return calls
+
+
+def test_summary_mode_scores_all_summaries_in_one_truncated_call(app, model, monkeypatch):
+    monkeypatch.setitem(app.config, 'SENTIMENT_MODE', 'summary')
+    sentiments = senti_analysis.sentiment_batch(['full text 1', 'full text 2'], ['a good day', 'a bad day'])
+    assert sentiments == [{'label': 'Positive', 'score': 0.9}, {'label': 'Negative', 'score': 0.9}]
+    assert len(model) == 1
+    texts, kwargs = model[0]
+    assert texts == ['a good day', 'a bad day']
+    assert kwargs['truncation'] is True and kwargs['max_length'] == senti_analysis.MAX_INPUT_TOKENS
+
+
+def test_single_summaries_are_truncated_too(app, model):
+    assert senti_analysis.senti_analysis('good ' * 2000) == ('Positive', 0.9)
+    assert model[0][1]['truncation'] is True
+
+
+def test_chunk_budget_is_spread_over_the_whole_text():
+    assert spread_evenly(list(range(10)), 4) == [0, 3, 6, 9]
+    assert spread_evenly(list(range(3)), 4) == [0, 1, 2]
+    assert spread_evenly(list(range(10)), 1) == [0]
+    words = ' '.join(f'w{i}.' for i in range(100))
+    chunks = senti_analysis.split_chunks(words, 10, 3)
+    assert [chunk.split()[0] for chunk in chunks] == ['w0.', 'w40.', 'w90.']
@@ -0,0 +1,85 @@
+from app import db, ingest, pipeline, reprocess, stored_text
+from app.models import Article
+
+TEXT = 'The central bank held rates steady on Thursday. ' * 40
+
+
+def save(user, folder, name, text):
+    result = {'url': f'https://news.example/{name}', 'title': name, 'author': 'Author', 'date': None,
+              'summary': 'Old summary', 'senti_score': 0.5, 'senti_label': 'Neutral', 'tags': 'old',
+              'embedding': None, 'summary_embedding': None, 'simhash': None,
+              'content_hash': stored_text.content_hash(text)}
+    ingest.save_articles(user.id, folder.id, [result], {result['content_hash']: stored_text.encode(text)})
+    db.session.commit()
+
+
+def stub_models(monkeypatch, tmp_path, fail_call=None):
+    # Records the texts of each model run; run number fail_call raises instead, as if
+    # the process were stopped there.
+    monkeypatch.setattr(reprocess, 'CHECKPOINT_PATH', str(tmp_path / 'reprocess.json'))
+    calls = []
+
+    def run_models(contents, max_count, min_count):
+        calls.append(list(contents))
+        if len(calls) == fail_call:
+            raise RuntimeError('interrupted')
+        return [(f'New summary {max_count}', {'label': 'Positive', 'score': 0.9}, 'new', None, None)
+                for _ in contents]
+
+    monkeypatch.setattr(reprocess, 'run_models', run_models)
+    return calls
+
+
+def test_text_is_stored_compressed(app, user, make_folder):
+    save(user, make_folder(), 'one', TEXT)
+    content = Article.query.one().content
+    assert len(content) < len(TEXT.encode('utf-8')) / 3
+    assert stored_text.decompress(content) == TEXT
+    assert stored_text.decompress(stored_text.decode(stored_text.encode(TEXT))) == TEXT
+    assert stored_text.decompress(None) is None
+
+
+def test_saved_urls_are_summarized_again_without_a_download(app, user, make_folder, models):
+    save(user, make_folder(), 'one', TEXT)
+    results, errors = pipeline.run_pipeline(['https://news.example/one'], 150, 50, user_id=user.id)
+    assert errors == []
+    assert models.fetched == []
+    assert models.modelled == [TEXT]
+    assert results[0]['summary'] == f'Summary of {TEXT[:10]}'
+
+
+def test_reprocess_resumes_from_its_checkpoint(app, user, make_folder, monkeypatch, tmp_path):
+    calls = stub_models(monkeypatch, tmp_path, fail_call=2)
+    folder = make_folder()
+    for i in range(5):
+        save(user, folder, f'a{i}', f'{TEXT} {i}')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['reprocess', '--batch-size', '2', '--max-count', '150'])
+    assert isinstance(result.exception, RuntimeError)
+    assert 'articles reprocessed' in result.output
+    assert reprocess.load_checkpoint()['processed'] == 2
+    assert [article.summary for article in Article.query.order_by(Article.id)] == \
+        ['New summary 150'] * 2 + ['Old summary'] * 3
+
+    result = runner.invoke(args=['reprocess', '--batch-size', '2', '--max-count', '150'])
+    assert result.exit_code == 0, result.output
+    assert 'Done: 5 of 5' in result.output
+    # The interrupted batch ran again; the first one did not.
+    assert [len(contents) for contents in calls] == [2, 2, 2, 1]
+    assert all(article.summary == 'New summary 150' for article in Article.query)
+    assert reprocess.load_checkpoint() is None
+
+
+def test_reprocess_ignores_a_checkpoint_for_other_settings(app, user, make_folder, monkeypatch, tmp_path):
+    calls = stub_models(monkeypatch, tmp_path)
+    folder = make_folder()
+    for i in range(3):
+        save(user, folder, f'a{i}', f'{TEXT} {i}')
+    # Copies of one text in two folders run through the models once.
+    save(user, make_folder('copy'), 'copy', f'{TEXT} 0')
+    reprocess.save_checkpoint({'settings': {'max_count': 100}, 'last_id': 3, 'processed': 3})
+    processed, total = reprocess.reprocess(200, 100, 10)
+    assert (processed, total) == (4, 4)
+    assert [len(contents) for contents in calls] == [3]
+    assert all(article.summary == 'New summary 200' for article in Article.query)
@@ -0,0 +1,91 @@
+import pytest
+from app import summarization
+
+BOS, EOS, OTHER = 0, 2, 5
+
+
+class Tokenizer:
+    # Word "w<n>" is token n + 10; any other word is OTHER.
+    def __call__(self, texts, max_length=None, truncation=False):
+        single = isinstance(texts, str)
+        encoded = []
+        for text in [texts] if single else texts:
+            ids = [BOS] + [int(word[1:]) + 10 if word[1:].isdigit() else OTHER for word in text.split()] + [EOS]
+            if truncation and len(ids) > max_length:
+                ids = ids[:max_length - 1] + [EOS]
+            encoded.append(ids)
+        return {'input_ids': encoded[0] if single else encoded}
+
+    def pad(self, batch, return_tensors=None):
+        return {'input_ids': batch['input_ids'], 'attention_mask': None}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return ' '.join(f'w{i - 10}' for i in ids if i >= 10)
+
+
+class Model:
+    # "Summarizes" each input as its first and last words, recording every call.
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, input_ids, attention_mask=None, max_length=None, min_length=None, num_beams=None,
+                 early_stopping=None):
+        self.calls.append({'inputs': [list(ids) for ids in input_ids], 'max_length': max_length,
+                           'num_beams': num_beams})
+        return [[BOS, ids[1], ids[-2], EOS] for ids in input_ids]
+
+
+@pytest.fixture
+def model(app, monkeypatch):
+    model = Model()
+    monkeypatch.setattr(summarization, 'get_model', lambda name: (Tokenizer(), model))
+    monkeypatch.setitem(app.config, 'LONG_DOC_ENABLED', True)
+    monkeypatch.setitem(app.config, 'LONG_DOC_OVERLAP', 100)
+    monkeypatch.setitem(app.config, 'LONG_DOC_MAX_CHUNKS', 6)
+    monkeypatch.setitem(app.config, 'LONG_DOC_CHUNK_BEAMS', 2)
+    monkeypatch.setitem(app.config, 'LONG_DOC_CHUNK_MAX_LENGTH', 150)
+    return model
+
+
+def document(words):
+    return ' '.join(f'w{i}' for i in range(words))
+
+
+def test_windows_overlap_and_keep_the_special_tokens():
+    ids = [BOS] + list(range(10, 2510)) + [EOS]
+    windows = summarization.split_windows(ids, 1024, 100, 6)
+    assert len(windows) == 3
+    assert all(window[0] == BOS and window[-1] == EOS and len(window) <= 1024 for window in windows)
+    assert windows[1][1] == windows[0][-101]
+    assert windows[-1][-2] == ids[-2]
+
+
+def test_window_budget_is_spread_over_the_whole_document():
+    ids = [BOS] + list(range(10, 20010)) + [EOS]
+    windows = summarization.split_windows(ids, 1024, 100, 4)
+    assert len(windows) == 4
+    assert windows[0][1] == ids[1]
+    assert windows[-1][-2] == ids[-2]
+
+
+def test_long_documents_are_summarized_window_by_window(model):
+    summaries = summarization._generate_summaries([document(3000), document(50)], 120, 30, batch_size=8)
+    map_call, reduce_call = model.calls
+    # Map: only the long document is windowed, with the cheaper chunk settings.
+    assert len(map_call['inputs']) == 4
+    assert all(len(ids) <= summarization.MAX_INPUT_TOKENS for ids in map_call['inputs'])
+    assert (map_call['max_length'], map_call['num_beams']) == (150, 2)
+    # Reduce: the joined partial summaries replace the long input; the short one is as given.
+    assert (reduce_call['max_length'], reduce_call['num_beams']) == (120, summarization.NUM_BEAMS)
+    # (The "summarize:" prefix is one token with no word in the fake summaries.)
+    assert sorted(len(ids) for ids in reduce_call['inputs']) == [2 + 7, 2 + 51]
+    assert summaries[0].endswith('w2999')
+    assert summaries[1] == 'w49'
+
+
+def test_truncate_mode_cuts_long_documents(app, model):
+    app.config['LONG_DOC_ENABLED'] = False
+    summaries = summarization._generate_summaries([document(3000)], 120, 30, batch_size=8)
+    assert len(model.calls) == 1
+    assert len(model.calls[0]['inputs'][0]) == summarization.MAX_INPUT_TOKENS
+    assert summaries == ['w1020']
@@ -0,0 +1,54 @@
+from app import db, ingest, tag_index
+from app.models import Article, ArticleTag, Tag
+
+
+def save(user, folder, name, tags):
+    result = {'url': f'https://news.example/{folder.id}/{name}', 'title': name, 'author': 'Author', 'date': None,
+              'summary': 's', 'senti_score': 0.5, 'senti_label': 'Neutral', 'tags': tags, 'embedding': None,
+              'summary_embedding': None, 'simhash': None}
+    ingest.save_articles(user.id, folder.id, [result])
+    db.session.commit()
+    return Article.query.filter_by(url=result['url']).one()
+
+
+def titles(response):
+    return sorted(article['title'] for article in response.get_json()['articles'])
+
+
+def test_tags_are_stored_once_normalized():
+    assert tag_index.parse_tags(' Climate ,climate,  Green   Energy,, ') == ['climate', 'green energy']
+
+
+def test_folder_articles_filter_by_tag(app, user, client, make_folder):
+    folder = make_folder()
+    save(user, folder, 'one', 'Climate, Energy')
+    save(user, folder, 'two', 'climate')
+    save(user, folder, 'three', 'Sports')
+    assert titles(client.get(f'/api/folders/{folder.id}/articles?tag=CLIMATE')) == ['one', 'two']
+    assert titles(client.get(f'/api/folders/{folder.id}/articles?tag=unknown')) == []
+    page = client.get(f'/folder/{folder.id}?tag=sports').get_data(as_text=True)
+    assert 'three' in page and '>one<' not in page
+
+
+def test_api_tags_counts_articles_per_tag(app, user, client, make_folder):
+    first, second = make_folder('first'), make_folder('second')
+    save(user, first, 'one', 'climate, energy')
+    save(user, first, 'two', 'climate')
+    save(user, second, 'three', 'climate, sports')
+    assert client.get('/api/tags').get_json()['tags'] == [
+        {'tag': 'climate', 'count': 3}, {'tag': 'energy', 'count': 1}, {'tag': 'sports', 'count': 1}]
+    assert client.get(f'/api/tags?folder={second.id}&limit=1').get_json()['tags'] == [{'tag': 'climate', 'count': 1}]
+
+
+def test_editing_tags_reindexes_the_article(app, user, client, make_folder):
+    folder = make_folder()
+    article = save(user, folder, 'one', 'climate, energy')
+    response = client.post(f'/edit_article/{article.id}', data={'tags': 'Energy, Politics'})
+    assert response.status_code == 302
+    names = {link.tag.name for link in ArticleTag.query.filter_by(article_id=article.id)}
+    assert names == {'energy', 'politics'}
+    assert titles(client.get(f'/api/folders/{folder.id}/articles?tag=climate')) == []
+    assert titles(client.get(f'/api/folders/{folder.id}/articles?tag=politics')) == ['one']
+    # The tag row stays for reuse; it just has no articles now.
+    assert Tag.query.filter_by(name='climate').count() == 1
+    assert [item['tag'] for item in client.get('/api/tags').get_json()['tags']] == ['energy', 'politics']
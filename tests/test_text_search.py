@@ -0,0 +1,67 @@
+import importlib.util
+import os
+import pytest
+from sqlalchemy import text
+from app import db, text_search
+from app.models import Article
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'versions',
+                         'e2a9c4f7b851_add_article_fts_index.py')
+
+
+@pytest.fixture
+def fts(app):
+    # create_all() knows nothing of article_fts; create it with the migration's own
+    # DDL so the triggers under test are the ones that ship.
+    spec = importlib.util.spec_from_file_location('fts_migration', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    for statement in migration.FTS_STATEMENTS:
+        db.session.execute(text(statement))
+    db.session.commit()
+    yield
+    db.session.rollback()
+    db.session.execute(text('DROP TABLE IF EXISTS article_fts'))
+    db.session.commit()
+
+
+def add_article(user, folder, i, title):
+    article = Article(url=f'https://news.example/{i}', title=title, summary=f'Summary {i}', tags='news',
+                      senti_score=0.5, senti_label='Neutral', user_id=user.id, folder_id=folder.id)
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+def search_page(client, query):
+    return client.get(f'/search?q={query}').get_data(as_text=True)
+
+
+def test_search_follows_inserts_updates_and_deletes(app, user, client, make_folder, fts):
+    folder = make_folder('World')
+    article = add_article(user, folder, 1, 'Volcano erupts overnight')
+    page = search_page(client, 'volcano')
+    assert '<mark>Volcano</mark> erupts overnight' in page
+    assert 'World' in page
+
+    article.title = 'Glacier melts overnight'
+    db.session.commit()
+    assert 'erupts' not in search_page(client, 'volcano')
+    assert '<mark>Glacier</mark>' in search_page(client, 'glac')
+
+    db.session.delete(article)
+    db.session.commit()
+    assert 'No saved articles match' in search_page(client, 'glacier')
+
+
+def test_search_loads_folders_with_the_articles(app, user, make_folder, fts):
+    folder = make_folder('Space')
+    for i in range(3):
+        add_article(user, folder, i, f'Comet sighting {i}')
+    user_id = user.id
+    db.session.expunge_all()
+    matches = text_search.search(user_id, 'comet')
+    assert len(matches) == 3
+    # search.html shows each match's folder name; it must not cost a query per row.
+    assert all('folder' in match['article'].__dict__ for match in matches)
+    assert matches[0]['article'].folder.name == 'Space'
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pytest
+from app import app as flask_app, db, embeddings, vector_index
+from app.models import Article
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    monkeypatch.setitem(flask_app.config, 'VECTOR_DELTA_MAX_ROWS', 1000)
+    return str(tmp_path / 'user_1.npz')
+
+
+def test_upsert_appends_to_the_delta_log(index_path):
+    index = vector_index.VectorIndex(index_path)
+    index.rebuild([1, 2], [unit(1, 0, 0), unit(0, 1, 0)])
+    base_stamp = vector_index.file_stamp(index_path)
+    index.upsert([3], [unit(0, 0, 1)])
+    index.upsert([1], [unit(0, 0.1, 1)])
+    index.remove([2])
+    # The base file is untouched; the changes are in the log.
+    assert vector_index.file_stamp(index_path) == base_stamp
+    assert len(index) == 2
+    ids, _ = index.search(unit(0, 0, 1), k=5)
+    assert ids == [3, 1]
+
+
+def test_other_instances_see_appended_and_compacted_changes(index_path):
+    writer = vector_index.VectorIndex(index_path)
+    writer.rebuild([1], [unit(1, 0)])
+    reader = vector_index.VectorIndex(index_path)
+    reader.load()
+    writer.upsert([2], [unit(0, 1)])
+    assert reader.search(unit(0, 1), k=1)[0] == [2]
+    writer.remove([1])
+    writer.compact()
+    assert os.path.getsize(writer.delta_path) == 0
+    assert reader.search(unit(1, 0), k=5)[0] == [2]
+    assert len(reader) == 1
+
+
+def test_compaction_starts_once_the_log_is_full(index_path):
+    flask_app.config['VECTOR_DELTA_MAX_ROWS'] = 3
+    index = vector_index.VectorIndex(index_path)
+    index.rebuild([], [])
+    for article_id in range(1, 5):
+        index.upsert([article_id], [unit(article_id, 1)])
+    with index.compact_lock:
+        pass
+    fresh = vector_index.VectorIndex(index_path)
+    fresh.load()
+    assert sorted(fresh.ids.tolist() + list(fresh.delta)) == [1, 2, 3, 4]
+    assert len(fresh.ids) >= 3
+
+
+def test_search_respects_allowed_ids_before_picking_the_top_k(index_path):
+    index = vector_index.VectorIndex(index_path)
+    vectors = [unit(1, i / 100) for i in range(50)]
+    index.rebuild(list(range(1, 51)), vectors)
+    index.upsert([51], [unit(1, 0.9)])
+    ids, _ = index.search(unit(1, 0), k=3, allowed_ids={40, 45, 51})
+    assert ids == [40, 45, 51]
+
+
+def test_search_falls_back_to_a_flat_scan_when_probed_partitions_are_empty(index_path):
+    flask_app.config.update(IVF_MIN_ROWS=10, IVF_NPROBE=1)
+    try:
+        index = vector_index.VectorIndex(index_path)
+        vectors = np.eye(4, dtype=np.float32)[np.arange(40) % 4]
+        index.rebuild(list(range(40)), vectors)
+        assert index.centroids is not None
+        query = unit(1, 0, 0, 0)
+        probed = int(np.argmax(index.centroids @ query))
+        index.remove(index.ids[index.assignments == probed].tolist())
+        ids, scores = index.search(query, k=3)
+        assert len(ids) == 3
+    finally:
+        flask_app.config.update(IVF_MIN_ROWS=20000, IVF_NPROBE=8)
+
+
+def test_semantic_search_filters_inside_the_index(app, user, client, make_folder, monkeypatch):
+    monkeypatch.setitem(app.config, 'SEARCH_RESULTS', 2)
+    near, far = make_folder('near'), make_folder('far')
+    for i in range(6):
+        folder = near if i < 4 else far
+        db.session.add(Article(url=f'https://news.example/{i}', title=f'Title {i}', summary='s', senti_score=0.9,
+                               senti_label='Positive', user_id=user.id, folder_id=folder.id,
+                               summary_embedding=embeddings.to_bytes(unit(1, i / 10))))
+    db.session.commit()
+    monkeypatch.setattr(embeddings, 'embed', lambda texts: np.stack([unit(1, 0)] * len(texts)))
+    page = client.get(f'/search?q=anything&mode=semantic&folder={far.id}').get_data(as_text=True)
+    assert 'Title 4' in page and 'Title 5' in page
+    assert 'Title 0' not in page